@@ -0,0 +1,204 @@
+import os
+import mmap
+import struct
+import marshal
+import warnings
+import threading
+import pygame
+from leveldata import stamp
+
+# Pre-decoded images and sounds, made by running this file
+PACK_PATH = os.path.join("Assets", "assets.pack")
+MAGIC = b"ERPK"
+# Bump when the layout changes so old packs are ignored
+VERSION = 2
+# magic, version, index offset, index length
+HEADER = struct.Struct("<4sIQQ")
+ALIGN = 16
+# Longer sounds (music) are left as files, the pack is for short effects
+MAX_SOUND_SECONDS = 10
+# Byte order of the pixels in the pack, the same as convert_alpha() gives on the usual 32-bit displays
+# Opaque images are stored the same way and convert()ed once when they're loaded, a BGRA surface would take the slower alpha blit
+PIXEL_FORMAT = "BGRA"
+
+
+class AssetPack:
+    """
+    A pack file mapped into memory: an index plus raw pixel buffers already at their final size, and PCM for short sounds
+    Images are wrapped as surfaces over the mapping without copying, nothing in the pack is ever decoded again
+    """
+    def __init__(self, path=PACK_PATH):
+        self.path = path
+        self.map = None
+        self.images = {}   # (path, (w, h) or None, opaque) -> (offset, w, h)
+        self.sounds = {}   # path -> (offset, length)
+        self.mixer = None  # (frequency, size, channels) the PCM was decoded for
+        self.stamps = {}   # source path -> (mtime, size) when it was packed
+        self.current = {}  # source path -> whether it's unchanged since, checked once per run
+        self.lock = threading.Lock()
+        self.opened = False
+
+    def open(self):
+        """Maps the pack on first use, a missing or outdated pack just leaves everything to be loaded from files"""
+        with self.lock:
+            if self.opened:
+                return
+            self.opened = True
+            try:
+                with open(self.path, "rb") as f:
+                    # Copy on write, so a stray draw onto a packed image can't reach the file
+                    self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+                magic, version, index_offset, index_length = HEADER.unpack_from(self.map, 0)
+                if magic != MAGIC or version != VERSION:
+                    self.map = None
+                    return
+                index = marshal.loads(self.map[index_offset:index_offset + index_length])
+            except (OSError, ValueError, EOFError, struct.error):
+                self.map = None
+                return
+            self.images = index["images"]
+            self.sounds = index["sounds"]
+            self.mixer = index["mixer"]
+            self.stamps = index["stamps"]
+
+    def disable(self):
+        """Stops serving anything from the pack, used while a new one is built from the files"""
+        with self.lock:
+            self.opened = True
+            self.map = None
+            self.images = {}
+            self.sounds = {}
+            self.stamps = {}
+            self.current = {}
+
+    def is_current(self, path):
+        """False once the source file changed since it was packed, it's then loaded from the file until the pack is rebuilt"""
+        current = self.current.get(path)
+        if current is None:
+            try:
+                current = stamp(path)[1:] == self.stamps.get(path)
+            except OSError:
+                current = False
+            if not current:
+                warnings.warn(f"{path} changed since {self.path} was built, rerun assetpack.py")
+            self.current[path] = current
+        return current
+
+    def has_image(self, path, scale=None, opaque=False):
+        self.open()
+        return (path, scale, opaque) in self.images and self.is_current(path)
+
+    def image(self, path, scale=None, opaque=False):
+        """
+        The packed surface for path drawn at scale, None if it isn't packed
+        opaque is for images the game convert()s, which drops their alpha
+        """
+        self.open()
+        entry = self.images.get((path, scale, opaque))
+        if entry is None or not self.is_current(path):
+            return None
+        offset, w, h = entry
+        surface = pygame.image.frombuffer(memoryview(self.map)[offset:offset + w * h * 4], (w, h), PIXEL_FORMAT)
+        return surface.convert() if opaque else surface
+
+    def sound(self, path):
+        """The packed Sound for path, None if it isn't packed or the mixer runs at a different format than it was packed for"""
+        self.open()
+        entry = self.sounds.get(path)
+        if entry is None or pygame.mixer.get_init() != self.mixer or not self.is_current(path):
+            return None
+        offset, length = entry
+        return pygame.mixer.Sound(buffer=memoryview(self.map)[offset:offset + length])
+
+
+pack = AssetPack()
+
+
+# ---------------------------------------------------------
+# Build
+# ---------------------------------------------------------
+
+def contents():
+    """
+    Everything that goes in the pack: [(path, scale, convert)] of images and [path] of sounds
+    Level backgrounds and items at the size the level draws them, the player, puzzle and end screen sprites
+    """
+    import level
+    import player
+    import credits
+    from item import BookshelfPuzzle, CodeBoxPuzzle
+    images = []
+    sounds = ["Assets/trap_door_open.mp3", "Assets/footstep.mp3", "Assets/whack.mp3", "Assets/hehe.mp3"]
+    level_id = 1
+    while True:
+        data = level.definition(level_id)
+        if data is None:
+            break
+        if data.background is not None:
+            images.append(data.background)
+        for name, args, image_size in data.items:
+            path, size = args[1], args[3]
+            resize = (int(image_size[0]*size[0]), int(image_size[1]*size[1]))
+            images.append((path, resize, None))
+            if data.door_open is not None and level.ITEM_CLASSES[name] is level.Door:
+                images.append((data.door_open, resize, "alpha"))
+            sounds.extend(level.ITEM_CLASSES[name].sounds)
+        level_id += 1
+    sprite_size = int(player.DEFAULT_SPRITE_SIZE)
+    images += [(path, (sprite_size, sprite_size), None) for path in player.FRAMES]
+    images += [(path, (BookshelfPuzzle.book_width, BookshelfPuzzle.book_height), "alpha") for path in BookshelfPuzzle.correct_order]
+    images += [(path, CodeBoxPuzzle.key_size, "alpha") for path in CodeBoxPuzzle.key_paths]
+    images += [(path, credits.FRAME_SIZE, "alpha") for path in credits.FRAMES]
+    return list(dict.fromkeys(images)), list(dict.fromkeys(sounds))
+
+def build(path=PACK_PATH):
+    """Decodes, scales and converts everything in contents() and writes the pack, returns (images, sounds, bytes)"""
+    import assets
+    pack.disable()
+    images, sounds = contents()
+    index = {"images": {}, "sounds": {}, "mixer": pygame.mixer.get_init(), "stamps": {}}
+    if index["mixer"] is None:
+        # No audio device, the sounds are left as files
+        sounds = []
+    with open(path + ".tmp", "wb") as f:
+        f.write(b"\0" * HEADER.size)
+
+        def write(data):
+            f.seek(-f.tell() % ALIGN, os.SEEK_CUR)
+            offset = f.tell()
+            f.write(data)
+            return offset
+
+        for image_path, scale, convert in images:
+            # Same decode, scale and convert as the game does, so packed pixels match what it would have drawn
+            surface = assets.image(image_path, scale, convert)
+            w, h = surface.get_size()
+            key = (image_path, scale and (int(scale[0]), int(scale[1])), convert == "convert")
+            index["images"][key] = (write(pygame.image.tobytes(surface, PIXEL_FORMAT)), w, h)
+            index["stamps"][image_path] = stamp(image_path)[1:]
+        for sound_path in sounds:
+            sound = pygame.mixer.Sound(sound_path)
+            if sound.get_length() > MAX_SOUND_SECONDS:
+                continue
+            raw = sound.get_raw()
+            index["sounds"][sound_path] = (write(raw), len(raw))
+            index["stamps"][sound_path] = stamp(sound_path)[1:]
+        data = marshal.dumps(index)
+        index_offset = write(data)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, index_offset, len(data)))
+        size = index_offset + len(data)
+    os.replace(path + ".tmp", path)
+    return len(index["images"]), len(index["sounds"]), size
+
+
+if __name__ == "__main__":
+    # Rerun whenever an asset or a level file changes
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    # The PCM is decoded for the mixer's format, the dummy driver opens the same default format without needing a sound card
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    # convert_alpha needs a display
+    pygame.display.set_mode((1, 1))
+    images, sounds, size = build()
+    print(f"{images} images, {sounds} sounds, {size / (1024 * 1024):.1f}MB -> {PACK_PATH}")
@@ -0,0 +1,145 @@
+import pygame
+import threading
+import atlas
+from assetpack import pack
+from collections import OrderedDict
+
+# Rough cost charged for a cached Font, FreeType faces are small compared to surfaces
+FONT_COST = 64 * 1024
+
+
+class AssetCache:
+    """
+    Shared cache for images, sounds and fonts with LRU eviction over a memory budget
+    Safe to fill from a worker thread, loaders run outside the lock so a slow decode never blocks a cache hit
+    """
+    def __init__(self, budget=256 * 1024 * 1024):
+        self.budget = budget
+        self.used = 0
+        self.entries = OrderedDict()   # key -> (asset, cost)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def get(self, key, loader, cost_of):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        asset = loader()
+        cost = cost_of(asset)
+        with self.lock:
+            # Another thread may have loaded the same key meanwhile, keep the first one
+            entry = self.entries.get(key)
+            if entry is not None:
+                return entry[0]
+            self.entries[key] = (asset, cost)
+            self.used += cost
+            self.evict()
+        return asset
+
+    def evict(self):
+        # Always keep the newest entry, even if it alone is over budget
+        while self.used > self.budget and len(self.entries) > 1:
+            key, (asset, cost) = self.entries.popitem(last=False)
+            self.used -= cost
+
+    def discard(self, path):
+        """Drops every cached variant of a file"""
+        with self.lock:
+            for key in [k for k in self.entries if k[1] == path]:
+                asset, cost = self.entries.pop(key)
+                self.used -= cost
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.used = 0
+
+    # ---------------------------------------------------------
+    # Loaders
+    # ---------------------------------------------------------
+
+    def image(self, path, scale=None, convert=None):
+        """
+        Returns the image at path, scaled to the (w, h) pixel size in scale
+        convert is None, "convert" or "alpha" (convert_alpha)
+        """
+        if scale is not None:
+            scale = (int(scale[0]), int(scale[1]))
+        key = ("image", path, scale, convert)
+        opaque = convert == "convert"
+        if pack.has_image(path, scale, opaque):
+            # Nothing to decode, alpha images are used straight from the mapped pack file so they cost nothing against the budget,
+            # opaque ones are a converted copy
+            return self.get(key, lambda: pack.image(path, scale, opaque), surface_cost if opaque else lambda surface: 0)
+
+        def load():
+            packed = atlas.find(path, scale)
+            if packed is not None:
+                # Shares the pixels of an atlas sheet instead of decoding and scaling a file of its own
+                sheet, rect = packed
+                return self.image(sheet, None, "alpha").subsurface(rect)
+            if scale is not None:
+                # Scale from the unscaled decode so the file is only read once
+                img = self.image(path, None, convert)
+                return pygame.transform.scale(img, scale)
+            img = pygame.image.load(path)
+            if convert == "alpha":
+                img = img.convert_alpha()
+            elif convert == "convert":
+                img = img.convert()
+            return img
+        return self.get(key, load, surface_cost)
+
+    def sound(self, path, volume=None):
+        """None when there is no mixer (no audio device), everything that plays sounds then stays silent"""
+        if pygame.mixer.get_init() is None:
+            return None
+        key = ("sound", path, None, volume)
+
+        def load():
+            snd = pack.sound(path)
+            if snd is None:
+                snd = pygame.mixer.Sound(path)
+            if volume is not None:
+                snd.set_volume(volume)
+            return snd
+        return self.get(key, load, sound_cost)
+
+    def font(self, path, size):
+        key = ("font", path, size, None)
+        return self.get(key, lambda: pygame.font.Font(path, size), lambda f: FONT_COST)
+
+
+def surface_cost(surface):
+    if surface.get_parent() is not None:
+        # A subsurface's pixels are already paid for by its parent
+        return 0
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+def sound_cost(snd):
+    init = pygame.mixer.get_init()
+    if not init:
+        return 0
+    frequency, size, channels = init
+    return int(snd.get_length() * frequency * channels * abs(size) // 8)
+
+
+cache = AssetCache()
+
+
+def image(path, scale=None, convert=None):
+    return cache.image(path, scale, convert)
+
+
+def sound(path, volume=None):
+    return cache.sound(path, volume)
+
+
+def font(path, size):
+    return cache.font(path, size)
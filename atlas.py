@@ -0,0 +1,172 @@
+import os
+import json
+import warnings
+import threading
+import pygame
+from leveldata import stamp
+
+# Packed sheets and their manifests, made by running this file
+ATLAS_DIR = os.path.join("Assets", "atlas")
+MAX_WIDTH = 2048
+# Sprites bigger than this either way are left as their own files, they'd mostly waste sheet space
+MAX_SPRITE = 512
+PADDING = 1
+
+
+# ---------------------------------------------------------
+# Runtime lookup
+# ---------------------------------------------------------
+
+index = None   # (path, (w, h) or None) -> (sheet path, rect)
+lock = threading.Lock()
+
+def load_index():
+    global index
+    with lock:
+        if index is not None:
+            return index
+        found = {}
+        stale = set()
+        if os.path.isdir(ATLAS_DIR):
+            for name in sorted(os.listdir(ATLAS_DIR)):
+                if not name.endswith(".json"):
+                    continue
+                with open(os.path.join(ATLAS_DIR, name)) as f:
+                    manifest = json.load(f)
+                for sprite in manifest["sprites"]:
+                    # A source image changed since the atlas was built, the file is loaded on its own instead
+                    if not is_current(sprite):
+                        stale.add(sprite["path"])
+                        continue
+                    size = tuple(sprite["size"]) if sprite["size"] else None
+                    found[(sprite["path"], size)] = (manifest["image"], pygame.Rect(sprite["rect"]))
+        if stale:
+            warnings.warn(f"{len(stale)} image(s) changed since the atlas was built, rerun atlas.py: {', '.join(sorted(stale))}")
+        index = found
+        return index
+
+def is_current(sprite):
+    try:
+        return list(stamp(sprite["path"])[1:]) == sprite.get("stamp")
+    except OSError:
+        return False
+
+def find(path, size=None):
+    """(sheet path, rect) of a packed sprite drawn at size, None if it isn't in any atlas"""
+    return load_index().get((path, size))
+
+def reset():
+    """Forgets the loaded manifests, for after the atlas was rebuilt"""
+    global index
+    with lock:
+        index = None
+
+
+# ---------------------------------------------------------
+# Packer
+# ---------------------------------------------------------
+
+def pack(sizes, max_width=MAX_WIDTH, padding=PADDING):
+    """
+    Shelf packs rectangles, tallest first
+    sizes: {key: (w, h)}, returns ({key: Rect}, (sheet width, sheet height))
+    """
+    order = sorted(sizes, key=lambda k: (-sizes[k][1], -sizes[k][0]))
+    # No wider than everything on one shelf, but always wide enough for the widest sprite
+    width = min(max_width, sum(w + padding for w, h in sizes.values()))
+    width = max(width, max(w for w, h in sizes.values()))
+    rects = {}
+    x = y = shelf_height = 0
+    for key in order:
+        w, h = sizes[key]
+        if x + w > width:
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        rects[key] = pygame.Rect(x, y, w, h)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+    return rects, (width, y + shelf_height)
+
+def build_sheet(name, sprites):
+    """
+    Packs sprites into ATLAS_DIR/name.png and writes the manifest next to it
+    sprites: set of (path, (w, h) or None), None keeps the image's own size
+    """
+    images = {}
+    for path, size in sprites:
+        img = pygame.image.load(path).convert_alpha()
+        if size is not None:
+            img = pygame.transform.scale(img, size)
+        if img.get_width() > MAX_SPRITE or img.get_height() > MAX_SPRITE:
+            continue
+        images[(path, size)] = img
+    if not images:
+        return None
+    rects, sheet_size = pack({key: img.get_size() for key, img in images.items()})
+    sheet = pygame.Surface(sheet_size, pygame.SRCALPHA)
+    for key, img in images.items():
+        # The sheet starts fully transparent, so this copies the pixels straight in instead of alpha blending
+        sheet.blit(img, rects[key], special_flags=pygame.BLEND_RGBA_MAX)
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    image_path = os.path.join(ATLAS_DIR, name + ".png").replace(os.sep, "/")
+    pygame.image.save(sheet, image_path)
+    manifest = {
+        "image": image_path,
+        "sprites": [
+            {"path": path, "size": list(size) if size else None, "rect": list(rects[(path, size)]), "stamp": list(stamp(path)[1:])}
+            for path, size in sorted(images, key=lambda k: (k[0], k[1] or (0, 0)))
+        ],
+    }
+    with open(os.path.join(ATLAS_DIR, name + ".json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return image_path, len(images), sheet_size
+
+def sheets():
+    """
+    What goes in which sheet, {sheet name: set of (path, size)}
+    One sheet per level with its item sprites at the size the level draws them, plus the book covers and keypad keys
+    """
+    import level
+    from item import Door, BookshelfPuzzle, CodeBoxPuzzle
+    groups = {}
+    level_id = 1
+    while True:
+        data = level.definition(level_id)
+        if data is None:
+            break
+        sprites = groups.setdefault(f"level_{level_id}", set())
+        for name, args, image_size in data.items:
+            path, size = args[1], args[3]
+            resize = (int(image_size[0]*size[0]), int(image_size[1]*size[1]))
+            sprites.add((path, resize))
+            if level.ITEM_CLASSES[name] is Door and data.door_open is not None:
+                sprites.add((data.door_open, resize))
+        level_id += 1
+    groups["books"] = {(path, (BookshelfPuzzle.book_width, BookshelfPuzzle.book_height)) for path in BookshelfPuzzle.correct_order}
+    groups["keys"] = {(path, CodeBoxPuzzle.key_size) for path in CodeBoxPuzzle.key_paths}
+    return groups
+
+def build():
+    """Rebuilds every sheet, stale sheets from an earlier build are removed first"""
+    if os.path.isdir(ATLAS_DIR):
+        for name in os.listdir(ATLAS_DIR):
+            if name.endswith((".png", ".json")):
+                os.remove(os.path.join(ATLAS_DIR, name))
+    built = {}
+    for name, sprites in sheets().items():
+        result = build_sheet(name, sprites)
+        if result is not None:
+            built[name] = result
+    reset()
+    return built
+
+
+if __name__ == "__main__":
+    # Rerun whenever a packed sprite or a level file changes, without an atlas the files are just loaded one by one
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    # convert_alpha needs a display
+    pygame.display.set_mode((1, 1))
+    for name, (path, count, (w, h)) in build().items():
+        print(f"{name:10} {count:3} sprites  {w}x{h}  {path}")
@@ -0,0 +1,114 @@
+import pygame
+import assets
+
+# Each category gets its own reserved channels so one kind of sound never cuts off another
+# (category, number of channels)
+GROUPS = (
+    ("footsteps", 1),
+    ("voice", 2),
+    ("sfx", 4),
+)
+
+
+class AudioManager:
+    """
+    Plays sound effects on per-category channel groups
+    A sound only replaces a playing one of the same category if its priority is at least as high
+    on_done callbacks fire from update() once the sound has finished, nothing ever waits on the mixer
+    Without a mixer (no audio device) every call is a silent no-op
+    """
+    def __init__(self, groups=GROUPS):
+        self.groups_config = groups
+        self.groups = None             # category -> [Channel]
+        self.priorities = {}           # Channel -> priority of what it's playing
+        self.pending = []              # (Channel, sound, callback) waiting for the sound to end
+
+    def setup(self):
+        """Reserves the channels, done on first use because the mixer has to be running"""
+        total = sum(count for category, count in self.groups_config)
+        if pygame.mixer.get_num_channels() < total + 4:
+            pygame.mixer.set_num_channels(total + 4)
+        pygame.mixer.set_reserved(total)
+        self.groups = {}
+        index = 0
+        for category, count in self.groups_config:
+            self.groups[category] = [pygame.mixer.Channel(index + i) for i in range(count)]
+            index += count
+
+    def channels(self, category):
+        if pygame.mixer.get_init() is None:
+            return []
+        if self.groups is None:
+            self.setup()
+        return self.groups[category]
+
+    def preload(self, paths):
+        """Decodes sounds into the asset cache ahead of time"""
+        if pygame.mixer.get_init() is None:
+            return
+        for path in paths:
+            assets.sound(path)
+
+    def play(self, sound, category="sfx", priority=0, loops=0, maxtime=0, volume=1.0, on_done=None):
+        """
+        sound: a Sound or a path to one
+        Returns the Channel it plays on, or None if every channel in the group is busy with something more important
+        """
+        if isinstance(sound, str):
+            sound = assets.sound(sound)
+        if sound is None or pygame.mixer.get_init() is None:
+            return None
+        channel = self.pick_channel(category, priority)
+        if channel is None:
+            return None
+        self.cancel(channel)
+        channel.set_volume(volume)
+        channel.play(sound, loops=loops, maxtime=maxtime)
+        self.priorities[channel] = priority
+        if on_done is not None:
+            self.pending.append((channel, sound, on_done))
+        return channel
+
+    def pick_channel(self, category, priority):
+        channels = self.channels(category)
+        if not channels:
+            return None
+        for channel in channels:
+            if not channel.get_busy():
+                return channel
+        lowest = min(channels, key=lambda c: self.priorities.get(c, 0))
+        if self.priorities.get(lowest, 0) <= priority:
+            return lowest
+        return None
+
+    def cancel(self, channel):
+        """Drops callbacks for a channel that is being reused or stopped"""
+        self.pending = [p for p in self.pending if p[0] is not channel]
+
+    def is_busy(self, category):
+        return any(channel.get_busy() for channel in self.channels(category))
+
+    def stop(self, category=None):
+        categories = [category] if category else [c for c, count in self.groups_config]
+        for c in categories:
+            for channel in self.channels(c):
+                channel.stop()
+                self.cancel(channel)
+
+    def update(self):
+        """Fires the callbacks of sounds that have finished, call once per frame"""
+        if not self.pending:
+            return
+        still_playing = []
+        finished = []
+        for channel, sound, callback in self.pending:
+            if channel.get_busy() and channel.get_sound() is sound:
+                still_playing.append((channel, sound, callback))
+            else:
+                finished.append(callback)
+        self.pending = still_playing
+        for callback in finished:
+            callback()
+
+
+audio = AudioManager()
@@ -0,0 +1,123 @@
+import headless
+import argparse
+import json
+import random
+import time
+import pygame
+import profiler as prof
+from profiler import FrameProfiler, percentile
+from timestep import FixedTimestep
+
+width, height = headless.width, headless.height
+
+# Walk a square so the player passes by items, collides and animates in both directions
+WALK = [pygame.K_d] * 60 + [pygame.K_s] * 30 + [pygame.K_a] * 60 + [pygame.K_w] * 30
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "mean": sum(samples) / len(samples) if samples else 0.0,
+        "max": samples[-1] if samples else 0.0,
+    }
+
+
+def synthetic_level(count, seed=0):
+    """Level 3 with its items swapped for count randomly placed props, half of them solid"""
+    from level import Level
+    from item import Item
+    rng = random.Random(seed)
+    level = Level(3, lambda *args, **kwargs: None)
+    half_w, half_h = width // 2, height // 2
+    items = [
+        Item("prop", "Assets/chest.png", (rng.randint(-half_w, half_w), rng.randint(-half_h, half_h)),
+             (0.25, 0.25), collision=(i % 2 == 0), interactable=True)
+        for i in range(count)
+    ]
+    level.set_items(items)
+    return level
+
+
+def bench_level(level, frames, surface):
+    """
+    Times each subsystem separately for frames frames, returns {subsystem: summary in ms}
+    The level is stepped through the game's fixed timestep with a fixed clock, one step a frame,
+    the step's own phases are read back from a profiler of its own
+    """
+    from player import Player
+    player = Player(width // 2, height // 2)
+    timestep = FixedTimestep(60)
+    step_clock = headless.FixedClock()
+    step_profiler = FrameProfiler(capacity=max(frames, 1))
+    timings = {name: [] for name in (
+        "step", "is_finished", "draw", "item_draw_glow", "frame",
+    )}
+    glow_item = next((item for item in level.items if item.can_glow()), None)
+    clock = time.perf_counter
+
+    for i in range(frames):
+        keys = headless.KeyState((WALK[i % len(WALK)],))
+        frame_start = clock()
+
+        t = clock()
+        step_profiler.begin_frame()
+        timestep.advance(step_clock.tick(), level, player, keys, step_profiler)
+        step_profiler.end_frame()
+        timings["step"].append(clock() - t)
+
+        t = clock()
+        level.is_finished()
+        timings["is_finished"].append(clock() - t)
+
+        t = clock()
+        player_rect = player.draw_rect(timestep.alpha())
+        level.draw(surface, player_rect)
+        surface.blit(player.current_frame(), player_rect.topleft)
+        timings["draw"].append(clock() - t)
+
+        if glow_item is not None:
+            glow = glow_item.glow
+            glow_item.glow = True
+            t = clock()
+            glow_item.draw(surface, glow_item.rect)
+            timings["item_draw_glow"].append(clock() - t)
+            glow_item.glow = glow
+
+        timings["frame"].append(clock() - frame_start)
+
+    # Already in ms
+    rows = [phases for scene, phases in step_profiler.rows()]
+    report = {prof.PHASES[phase]: summarize([row[phase] for row in rows])
+              for phase in (prof.HANDLE_INPUT, prof.UPDATE_INTERACTABLE, prof.COLLIDE_PLAYER) if rows}
+    report.update({name: summarize([s * 1000 for s in samples]) for name, samples in timings.items() if samples})
+    return report
+
+
+def run(frames, sizes, output):
+    surface = headless.init()
+    from level import Level
+    report = {"frames": frames, "levels": {}}
+    for level_id in (1, 2, 3, 4):
+        level = Level(level_id, lambda *args, **kwargs: None)
+        report["levels"][f"level_{level_id}"] = bench_level(level, frames, surface)
+    for count in sizes:
+        report["levels"][f"synthetic_{count}"] = bench_level(synthetic_level(count), frames, surface)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless per-subsystem frame time benchmark")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100, 500, 2000], help="item counts for synthetic levels")
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+    report = run(args.frames, args.sizes, args.output)
+    for name, timings in report["levels"].items():
+        frame = timings["frame"]
+        print(f"{name:16} frame p50 {frame['p50']:.3f}ms  p95 {frame['p95']:.3f}ms  p99 {frame['p99']:.3f}ms")
+    print(f"wrote {args.output}")
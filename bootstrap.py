@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import platform
+import ctypes
+from contextlib import contextmanager
+
+# Set before anything else so the whole startup is measured
+started = time.perf_counter()
+# --startup-profile prints how long each import and init step took once the start menu is up
+# Read straight from argv because the steps run while main.py is still importing, before it parses its arguments
+PROFILE = "--startup-profile" in sys.argv
+
+# Everything is drawn to a canvas this size, pygame.SCALED stretches it to whatever the real display is in one step
+CANVAS = (1920, 1080)
+
+steps = []   # (name, seconds)
+initialized = False
+reported = False
+window = None
+
+
+@contextmanager
+def step(name):
+    """Times a startup step for the --startup-profile report"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        steps.append((name, time.perf_counter() - start))
+
+
+def setup_dpi():
+    """Keeps the OS from scaling the window, has to happen before SDL creates one"""
+    if platform.system() == "Windows":
+        try:
+            ctypes.windll.user32.SetProcessDPIAware()
+        except Exception:
+            pass
+
+    if platform.system() == "Darwin":
+        os.environ["SDL_HINT_VIDEO_HIGHDPI_DISABLED"] = "0"
+        os.environ["PYGAME_FORCE_HIGHDPI"] = "1"
+
+
+def init():
+    """
+    Starts SDL once, in order: DPI setup, video, fonts, audio, then whatever pygame.init() has left
+    Safe to call from anywhere, only the first call does anything
+    """
+    global initialized
+    if initialized:
+        return
+    initialized = True
+    with step("dpi setup"):
+        setup_dpi()
+    with step("import pygame"):
+        import pygame
+    with step("init video"):
+        pygame.display.init()
+    with step("init fonts"):
+        pygame.font.init()
+    with step("init audio"):
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            # No audio device, the game still runs, just silent
+            pass
+    with step("init rest"):
+        pygame.init()
+
+
+def display(size, flags=0, vsync=False):
+    """Creates the game window, or returns it if it already exists"""
+    global window
+    import pygame
+    init()
+    if window is None:
+        with step("create window"):
+            try:
+                window = pygame.display.set_mode(size, flags, vsync=int(vsync))
+            except pygame.error:
+                # Not every display and flag combination can vsync
+                if not vsync:
+                    raise
+                window = pygame.display.set_mode(size, flags)
+    return window
+
+
+def report(stage="start menu"):
+    """Prints the startup steps when running with --startup-profile, only the first time, later calls aren't startup anymore"""
+    global reported
+    if not PROFILE or reported:
+        return
+    reported = True
+    total = time.perf_counter() - started
+    print(f"startup profile, {total * 1000:.1f}ms to {stage}")
+    for name, seconds in steps:
+        print(f"  {name:24} {seconds * 1000:8.1f}ms")
+    print(f"  {'other':24} {(total - sum(s for n, s in steps)) * 1000:8.1f}ms")
@@ -0,0 +1,140 @@
+import os
+import atexit
+import struct
+import threading
+from gamestate import state
+
+SAVE_PATH = "checkpoint.sav"
+MAGIC = b"ERSV"
+# Bump when the layout changes, older checkpoints are then ignored
+VERSION = 2
+# magic, version, level id, flags, seed, barrel, number of LEVEL records that follow
+HEADER = struct.Struct("<4sHBIIBB")
+# level id, item layout (see level.layout), finished items, inactive items
+LEVEL = struct.Struct("<BIQQ")
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+def level_layout(level_id):
+    # Imported here, level pulls in pygame and every item class
+    from level import layout
+    return layout(level_id)
+
+
+def encode(level_id, snapshot, layout=level_layout):
+    """
+    A GameState snapshot and the level being played as a checkpoint record, about a hundred bytes
+    layout(level id) stamps each level's item order, item state is kept by index
+    """
+    flags, finished, inactive, seed, barrel = snapshot
+    levels = sorted(set(dict(finished)) | set(dict(inactive)))
+    finished, inactive = dict(finished), dict(inactive)
+    try:
+        data = [HEADER.pack(MAGIC, VERSION, level_id, flags, seed, barrel, len(levels))]
+        data += [LEVEL.pack(l, layout(l), finished.get(l, 0), inactive.get(l, 0)) for l in levels]
+    except struct.error as e:
+        raise CheckpointError(f"state doesn't fit the checkpoint format: {e}") from None
+    return b"".join(data)
+
+def decode(data, layout=level_layout):
+    """
+    (level id, snapshot) from a record made by encode(), CheckpointError if it isn't one this version wrote
+    or a level file changed its items since, their state would land on the wrong items
+    """
+    try:
+        magic, version, level_id, flags, seed, barrel, count = HEADER.unpack_from(data, 0)
+    except struct.error:
+        raise CheckpointError("truncated checkpoint") from None
+    if magic != MAGIC:
+        raise CheckpointError("not a checkpoint")
+    if version != VERSION:
+        raise CheckpointError(f"checkpoint version {version}, expected {VERSION}")
+    if len(data) != HEADER.size + count * LEVEL.size:
+        raise CheckpointError("truncated checkpoint")
+    finished, inactive = [], []
+    for l, stamp, f, i in LEVEL.iter_unpack(data[HEADER.size:]):
+        if stamp != layout(l):
+            raise CheckpointError(f"level {l} changed since the checkpoint")
+        if f:
+            finished.append((l, f))
+        if i:
+            inactive.append((l, i))
+    return level_id, (flags, tuple(finished), tuple(inactive), seed, barrel)
+
+
+class Autosaver:
+    """
+    Writes checkpoints on a background thread so the game loop never waits on the disk
+    Only the newest checkpoint matters, one that's still waiting to be written is replaced by the next
+    """
+    def __init__(self, path=SAVE_PATH):
+        self.path = path
+        self.pending = None
+        self.last = None   # the newest record handed to the thread, an unchanged game isn't written again
+        self.writing = False
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def save(self, level_id):
+        """Checkpoints the level being played and the game state as they are right now"""
+        data = encode(level_id, state.snapshot())
+        with self.condition:
+            if data == self.last:
+                return
+            self.last = data
+            self.pending = data
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                data, self.pending = self.pending, None
+                self.writing = True
+            try:
+                # Written next to the old one and swapped in, so a crash mid-write still leaves a whole checkpoint
+                with open(self.path + ".tmp", "wb") as f:
+                    f.write(data)
+                os.replace(self.path + ".tmp", self.path)
+            except OSError:
+                # Can't save, the game goes on without checkpoints
+                pass
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+    def flush(self):
+        """Waits for the last checkpoint to reach the disk"""
+        with self.condition:
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+
+    def load(self):
+        """(level id, snapshot) of the saved checkpoint, None if there isn't a usable one"""
+        self.flush()
+        try:
+            with open(self.path, "rb") as f:
+                return decode(f.read())
+        except (OSError, CheckpointError):
+            return None
+
+    def clear(self):
+        """Forgets the checkpoint, once the game has been finished"""
+        self.flush()
+        self.last = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+saver = Autosaver()
+# A checkpoint taken just before quitting still gets written
+atexit.register(saver.flush)
@@ -0,0 +1,75 @@
+import time
+import threading
+import pygame
+import assets
+
+FRAMES = [f"Assets/end_{i}.png" for i in range(1, 16)]
+FRAME_SIZE = (1920, 1150)
+# How long each frame stays up (ms), the last one holds before the end menu opens
+SCHEDULE = [
+    300, 300, 800, 300, 300, 300, 300, 300, 300, 300,
+    1300, 50, 50, 50, 3000,
+]
+# The end music starts as this frame comes up
+MUSIC_FRAME = 1
+
+frames = [None] * len(FRAMES)
+ready = [threading.Event() for path in FRAMES]
+worker = None
+
+
+def decode():
+    for i, path in enumerate(FRAMES):
+        try:
+            frames[i] = assets.image(path, FRAME_SIZE, "alpha")
+        except Exception as e:
+            # Raised again by play() on the main thread, which would otherwise wait for this frame forever
+            frames[i] = e
+        ready[i].set()
+
+def prefetch():
+    """Starts decoding and scaling the frames in order on a background thread, only the first call does anything"""
+    global worker
+    if worker is None:
+        worker = threading.Thread(target=decode, daemon=True)
+        worker.start()
+
+def wait_until(deadline):
+    """Sleeps until deadline (perf_counter time), keeping the window responsive"""
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        pygame.event.pump()
+        pygame.time.wait(max(1, min(int(remaining * 1000), 10)))
+
+def play(surface, start_music=None):
+    """
+    Shows the credits on surface following SCHEDULE, returns a copy of the last frame for the end menu
+    Frames that haven't been decoded yet are waited for, a late frame shortens the time left for the next ones instead of adding to it
+    """
+    prefetch()
+    start = time.perf_counter()
+    deadline = start
+    for i, hold in enumerate(SCHEDULE):
+        ready[i].wait()
+        if isinstance(frames[i], Exception):
+            error = frames[i]
+            reset()
+            raise error
+        if i == MUSIC_FRAME and start_music is not None:
+            start_music()
+        surface.blit(frames[i], (0, 0))
+        pygame.display.flip()
+        deadline += hold / 1000
+        wait_until(deadline)
+    reset()
+    return surface.copy()
+
+def reset():
+    """Lets go of the decoded frames, the asset cache decides how long they stay around"""
+    global worker
+    for i in range(len(FRAMES)):
+        frames[i] = None
+        ready[i].clear()
+    worker = None
@@ -0,0 +1,81 @@
+import random
+
+# What the player has picked up or found, one bit each in GameState.flags
+WINE = 1 << 0
+FEATHER = 1 << 1
+SHOVEL = 1 << 2
+TRAPDOOR = 1 << 3
+LADDER = 1 << 4
+RED_LIGHT = 1 << 5
+GREEN_LIGHT = 1 << 6
+GRAY_LIGHT = 1 << 7
+BLUE_LIGHT = 1 << 8
+HAMMER = 1 << 9
+CHEESE = 1 << 10
+BATTERY = 1 << 11
+HINT = 1 << 12
+ALL_LIGHTS = RED_LIGHT | GREEN_LIGHT | GRAY_LIGHT | BLUE_LIGHT
+
+# Which of level 4's barrels has the battery
+BARRELS = 3
+
+
+class GameState:
+    """
+    The player's progress through one game
+    flags: the bits above
+    finished / inactive: per level id, a bitmask over the level's items by their index in the level file
+    seed: picks everything random about the game that has to stay the same when it's restored, like the battery barrel
+    """
+    __slots__ = ("flags", "finished", "inactive", "seed", "barrel")
+
+    def __init__(self, seed=None):
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Back to a new game, with a new seed unless one is given"""
+        self.flags = 0
+        self.finished = {}
+        self.inactive = {}
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.barrel = random.Random(self.seed).randint(1, BARRELS)
+
+    def has(self, flags):
+        """True if every bit in flags is set"""
+        return self.flags & flags == flags
+
+    def give(self, flags):
+        self.flags |= flags
+
+    def item_finished(self, level_id, index):
+        self.finished[level_id] = self.finished.get(level_id, 0) | (1 << index)
+
+    def item_active(self, level_id, index, active):
+        bits = self.inactive.get(level_id, 0)
+        self.inactive[level_id] = bits & ~(1 << index) if active else bits | (1 << index)
+
+    def is_item_finished(self, level_id, index):
+        return bool(self.finished.get(level_id, 0) >> index & 1)
+
+    def is_item_active(self, level_id, index):
+        return not self.inactive.get(level_id, 0) >> index & 1
+
+    def snapshot(self):
+        """Everything as a tuple of ints, restore() puts it back"""
+        return (
+            self.flags,
+            tuple(sorted(self.finished.items())),
+            tuple(sorted(self.inactive.items())),
+            self.seed,
+            self.barrel,
+        )
+
+    def restore(self, snapshot):
+        flags, finished, inactive, self.seed, self.barrel = snapshot
+        self.flags = flags
+        self.finished = dict(finished)
+        self.inactive = dict(inactive)
+
+
+# The game in progress, items and levels read and update it
+state = GameState()
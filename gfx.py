@@ -0,0 +1,100 @@
+import weakref
+import pygame
+
+# The GPU backend needs the renderer pygame.SCALED puts behind the window, pygame._sdl2 is optional in pygame builds
+try:
+    from pygame._sdl2.video import Window, Renderer, Texture
+except ImportError:
+    Renderer = None
+
+
+# ---------------------------------------------------------
+# Drawing interface
+# ---------------------------------------------------------
+# Level.draw, Item.draw and the scenes draw onto a target, either a pygame.Surface (software)
+# or a TextureTarget (GPU). Both take target.blit(image, pos, area), everything else goes through here.
+
+def rect(target, color, rect, width=0):
+    """pygame.draw.rect for any target"""
+    if isinstance(target, pygame.Surface):
+        pygame.draw.rect(target, color, rect, width)
+    else:
+        target.draw_rect(color, rect, width)
+
+def present(target):
+    """Shows what was drawn this frame"""
+    if isinstance(target, pygame.Surface):
+        pygame.display.flip()
+    else:
+        target.present()
+
+
+class TextureTarget:
+    """
+    Draws through the SDL renderer instead of blitting on the CPU
+    Each surface is uploaded as a texture the first time it's drawn and the texture is kept for as long as the surface lives,
+    so backgrounds, sprites, glows and player frames cost one upload each and then only GPU time
+    """
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.textures = weakref.WeakKeyDictionary()   # surface -> Texture
+
+    @classmethod
+    def create(cls):
+        """A target for the current window, None if there is no renderer to draw with and the software path has to be used"""
+        if Renderer is None:
+            return None
+        try:
+            return cls(Renderer.from_window(Window.from_display_module()))
+        except (pygame.error, AttributeError):
+            return None
+
+    def texture(self, image):
+        texture = self.textures.get(image)
+        if texture is None:
+            texture = Texture.from_surface(self.renderer, image)
+            self.textures[image] = texture
+        return texture
+
+    def changed(self, image):
+        """Drops the texture of a surface that was drawn on since it was uploaded"""
+        self.textures.pop(image, None)
+
+    def blit(self, image, pos, area=None):
+        if isinstance(pos, pygame.Rect):
+            pos = pos.topleft
+        if area is None:
+            w, h = image.get_size()
+        else:
+            area = pygame.Rect(area)
+            w, h = area.size
+        self.texture(image).draw(srcrect=area, dstrect=(pos[0], pos[1], w, h))
+
+    def draw_rect(self, color, rect, width=0):
+        self.renderer.draw_color = pygame.Color(color)
+        rect = pygame.Rect(rect)
+        if width == 0:
+            self.renderer.fill_rect(rect)
+            return
+        # Borders are drawn inwards, like pygame.draw.rect
+        for i in range(width):
+            self.renderer.draw_rect(rect.inflate(-2 * i, -2 * i))
+
+    def present(self):
+        self.renderer.present()
+
+
+# The GPU target once main created the window and asked for one, None on the software path
+gpu = None
+
+
+def use_gpu():
+    """Switches to the GPU backend if the window has a renderer, returns whether it did"""
+    global gpu
+    gpu = TextureTarget.create()
+    return gpu is not None
+
+def changed(image):
+    """Call after drawing on a surface that may already have been uploaded"""
+    if gpu is not None:
+        gpu.changed(image)
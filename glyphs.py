@@ -0,0 +1,71 @@
+import pygame
+from collections import OrderedDict
+import assets
+
+FONT_PATH = "Assets/PressStart2P-Regular.ttf"
+# Printable ASCII is rasterized up front, anything else is added the first time it's drawn
+ATLAS_CHARS = "".join(chr(c) for c in range(32, 127))
+# How many finished strings each atlas remembers
+STRING_CACHE_SIZE = 128
+
+
+class GlyphAtlas:
+    """
+    Every glyph of one font at one size and color, rasterized once into a single surface
+    Strings are built by blitting glyphs, PressStart2P is fixed-width so there's no kerning to worry about
+    """
+    def __init__(self, path, size, color):
+        self.font = assets.font(path, size)
+        self.color = color
+        self.height = self.font.get_height()
+        self.glyphs = {}
+        self.strings = OrderedDict()
+
+        advances = [self.font.size(ch)[0] for ch in ATLAS_CHARS]
+        self.surface = pygame.Surface((sum(advances), self.height), pygame.SRCALPHA)
+        x = 0
+        for ch, advance in zip(ATLAS_CHARS, advances):
+            self.surface.blit(self.font.render(ch, True, color), (x, 0))
+            self.glyphs[ch] = self.surface.subsurface((x, 0, advance, self.height))
+            x += advance
+
+    def glyph(self, ch):
+        glyph = self.glyphs.get(ch)
+        if glyph is None:
+            glyph = self.font.render(ch, True, self.color)
+            self.glyphs[ch] = glyph
+        return glyph
+
+    def render(self, text):
+        surface = self.strings.get(text)
+        if surface is not None:
+            self.strings.move_to_end(text)
+            return surface
+        glyphs = [self.glyph(ch) for ch in text]
+        surface = pygame.Surface((max(1, sum(g.get_width() for g in glyphs)), self.height), pygame.SRCALPHA)
+        x = 0
+        for g in glyphs:
+            # Glyph cells never overlap, so copy the pixels straight in instead of alpha blending
+            surface.blit(g, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += g.get_width()
+        self.strings[text] = surface
+        if len(self.strings) > STRING_CACHE_SIZE:
+            self.strings.popitem(last=False)
+        return surface
+
+
+atlases = {}
+
+
+def get_atlas(size, color=(0, 0, 0), path=FONT_PATH):
+    key = (path, size, tuple(color))
+    atlas = atlases.get(key)
+    if atlas is None:
+        atlas = GlyphAtlas(path, size, tuple(color))
+        atlases[key] = atlas
+    return atlas
+
+
+def render(text, size, color=(0, 0, 0), path=FONT_PATH):
+    """Drop-in for font.render(text, True, color) with the game font"""
+    return get_atlas(size, color, path).render(text)
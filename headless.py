@@ -0,0 +1,149 @@
+import os
+import time
+
+# SDL picks its drivers when the subsystem starts, so these have to be set before pygame.init()
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+import bootstrap
+from audio import audio
+import scenes
+from timestep import FixedTimestep
+import messages
+from gamestate import state
+
+width, height = bootstrap.CANVAS
+center_x, center_y = width // 2, height // 2
+
+
+def init(size=(width, height)):
+    """
+    Starts pygame on the dummy video and audio drivers and creates an offscreen display
+    Level, Player and the minigames need a display surface for convert() so one is always made
+    """
+    # Restart the subsystems in case another module already ran pygame.init() with the real drivers
+    pygame.display.quit()
+    pygame.mixer.quit()
+    pygame.init()
+    return pygame.display.set_mode(size)
+
+
+class KeyState:
+    """Stands in for pygame.key.get_pressed(), indexable by key constant"""
+    def __init__(self, held=()):
+        self.held = set(held)
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+class ScriptedInput:
+    """
+    Input source that replays a script of frames
+    Each frame is (held keys, list of pygame events), the last frame repeats once the script runs out
+    """
+    def __init__(self, frames):
+        self.frames = list(frames) or [((), [])]
+        self.index = 0
+
+    def poll(self):
+        held, events = self.frames[min(self.index, len(self.frames) - 1)]
+        self.index += 1
+        return KeyState(held), list(events)
+
+
+class LiveInput:
+    """Input source that reads the real keyboard and event queue like main.game() does"""
+    def poll(self):
+        return pygame.key.get_pressed(), pygame.event.get()
+
+
+class FixedClock:
+    """Clock that never sleeps and reports the same dt every tick, for deterministic runs, the default is one step at 60 steps a second"""
+    def __init__(self, dt=1000 / 60):
+        self.dt = dt
+
+    def tick(self, framerate=0):
+        return self.dt
+
+
+class UncappedClock:
+    """Clock that never sleeps and reports the real time between ticks"""
+    def __init__(self):
+        self.last = time.perf_counter()
+
+    def tick(self, framerate=0):
+        now = time.perf_counter()
+        dt = int((now - self.last) * 1000)
+        self.last = now
+        return dt
+
+
+class Simulation:
+    """
+    Steps the game one frame at a time the way main.game() does, without menus, pausing or a window
+    Each frame advances the level by the clock's dt through the same fixed timestep, at sim_rate steps a second
+    Puzzles and minigames opened by interacting run as scenes and get the scripted events
+    Messages shown by items and levels are collected in self.messages
+    seed fixes what's random about the game, like which barrel has the battery
+    """
+    def __init__(self, level_id=1, input_source=None, clock=None, surface=None, render=True, seed=None, sim_rate=60):
+        # Imported here so the driver setup above runs before these modules call pygame.init()
+        from level import Level
+        from player import Player
+        self.Level = Level
+        self.surface = surface or pygame.display.get_surface() or init()
+        self.input = input_source or ScriptedInput([])
+        self.clock = clock or UncappedClock()
+        self.render = render
+        self.messages = []
+        state.reset(seed)
+        self.player = Player(center_x, center_y, rate=sim_rate)
+        self.timestep = FixedTimestep(sim_rate)
+        self.level = Level(level_id, self.show_message)
+        self.frames = 0
+
+    def show_message(self, text, duration=2, size=32, queue=False, priority=messages.NORMAL):
+        self.messages.append(text)
+
+    def step(self):
+        """Runs one frame, returns False once the last level is finished"""
+        dt = self.clock.tick(0)
+        audio.update()
+        level, player = self.level, self.player
+        keys, events = self.input.poll()
+        if scenes.stack.top():
+            scenes.stack.step(events, dt, self.surface)
+            self.frames += 1
+            return True
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_e:
+                player.try_interact(level.interact_candidates())
+        self.timestep.advance(dt, level, player, keys)
+        if self.render:
+            player_rect = player.draw_rect(self.timestep.alpha())
+            level.draw(self.surface, player_rect)
+            self.surface.blit(player.current_frame(), player_rect.topleft)
+        self.frames += 1
+        if level.is_finished():
+            self.level = self.Level(level.level_id + 1, self.show_message)
+            player.rect.center = (center_x, center_y)
+            player.snap()
+        return self.level.level_id <= 4
+
+    def run(self, frames):
+        """Steps up to frames times with no frame cap, returns how many frames ran and the frames per second"""
+        start = time.perf_counter()
+        ran = 0
+        while ran < frames and self.step():
+            ran += 1
+        elapsed = time.perf_counter() - start
+        return {"frames": ran, "seconds": elapsed, "fps": ran / elapsed if elapsed else 0.0}
+
+
+if __name__ == "__main__":
+    init()
+    walk = [((pygame.K_d,), [])] * 60 + [((pygame.K_a,), [])] * 60
+    sim = Simulation(input_source=ScriptedInput(walk * 10))
+    print(sim.run(1200))
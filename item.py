@@ -1,66 +1,117 @@
 import pygame
+import bootstrap
 import time
 import random
-from color_game import ColorMemoryGame
-from whackamole import WhackAMole
-import os
-import platform
-import ctypes
-
-if platform.system() == "Windows":
-    try:
-        ctypes.windll.user32.SetProcessDPIAware()
-    except Exception:
-        pass
-
-if platform.system() == "Darwin":
-    os.environ["SDL_HINT_VIDEO_HIGHDPI_DISABLED"] = "0"
-    os.environ["PYGAME_FORCE_HIGHDPI"] = "1"
-
-pygame.init()
-width, height = 1920, 1080
+import assets
+from audio import audio
+import glyphs
+import gfx
+import scenes
+import gamestate
+from gamestate import state
+from scenes import LevelScene
+width, height = bootstrap.CANVAS
 half_w = width // 2
 half_h = height // 2
 
-wine = False
-feather = False
-has_shovel = False
+# Changing any of these can change what the level's baked static layer looks like
+LAYER_ATTRS = frozenset(("image", "rect", "is_active", "interactable", "reinteractable"))
+
+# Glow overlays by size, shared by every item that size and only made once something that size glows
+glows = {}
+
+def glow_surface(size):
+    glow = glows.get(size)
+    if glow is None:
+        glow = pygame.Surface(size, pygame.SRCALPHA)
+        glow.fill((255,255,255,100))
+        glows[size] = glow
+    return glow
 
 
 class Item:
-    def __init__(self, name, image_path, pos, size=(1,1), collision=True, interactable=True, reinteractable=True, never_interactable=False):
-        global barrel
-        barrel = random.randint(1,3)
+    # Subclasses declare __slots__ too, with () unless they add attributes of their own
+    __slots__ = (
+        "name", "image_path", "_image", "resize", "rect", "interact_radius",
+        "collision", "interactable", "never_interactable", "reinteractable", "glow", "can_interact_now",
+        "is_active", "_finished", "level", "show_message",
+    )
+    # Sound effects the item can play, preloaded with the level
+    sounds = ()
+    # What finishing the item sets besides is_finished, so a checkpoint can put it straight back
+    finished_attrs = {}
+
+    def __init__(self, name, image_path, pos, size=(1,1), collision=True, interactable=True, reinteractable=True, never_interactable=False, image_size=None):
+        """
+        image_size: unscaled size of the image if it's already known (level files have it compiled in),
+        then the image isn't loaded until the item is first drawn
+        """
         self.name = name
-        self.image = pygame.image.load(image_path)
+        self.image_path = image_path
+        self._image = None
+        if image_size is None:
+            image_size = assets.image(image_path).get_size()
         world_x, world_y = pos
         screen_x = world_x + half_w
         screen_y = half_h - world_y
-        self.rect = self.image.get_rect(center=(screen_x, screen_y))
         self.collision = collision
         self.interactable = interactable
         self.never_interactable = never_interactable
         self.glow = False
         self.reinteractable = reinteractable
-        resize = (self.rect.width*size[0], self.rect.height*size[1])
+        resize = (image_size[0]*size[0], image_size[1]*size[1])
         self.resize = resize
-        if resize != None:
-            self.image = pygame.transform.scale(self.image, resize)
-        self.rect = self.image.get_rect(center=(screen_x, screen_y))
+        self.rect = pygame.Rect((0, 0), (int(resize[0]), int(resize[1])))
+        self.rect.center = (screen_x, screen_y)
         world_x = max(-half_w + self.rect.width//2, min(world_x, half_w - self.rect.width//2))
         world_y = max(-half_h + self.rect.height//2, min(world_y, half_h - self.rect.height//2))
         self.rect.center = (world_x + half_w, half_h - world_y)
         x = max(self.rect.width, 150)
         y = max(self.rect.height, 150)
         self.interact_radius = (x,y)
-        self.glow_surface = self.create_glow_surface()
         self.is_active = True
         self.is_finished = False
 
-    def create_glow_surface(self):
-        glow = pygame.Surface(self.rect.size, pygame.SRCALPHA)
-        glow.fill((255,255,255,100))
-        return glow
+    @property
+    def image(self):
+        if self._image is None:
+            self._image = assets.image(self.image_path, self.resize)
+        return self._image
+
+    @image.setter
+    def image(self, value):
+        self._image = value
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in LAYER_ATTRS:
+            level = getattr(self, "level", None)
+            if level is not None:
+                level.static_dirty = True
+                if name == "rect":
+                    level.item_moved(self)
+                elif name == "is_active":
+                    level.on_item_active(self)
+
+    def can_glow(self):
+        return self.is_active and self.interactable and self.reinteractable
+
+    @property
+    def is_finished(self):
+        return self._finished
+
+    @is_finished.setter
+    def is_finished(self, value):
+        """Pushes a completion event to the level the first time the item is finished"""
+        was_finished = getattr(self, "_finished", False)
+        self._finished = value
+        level = getattr(self, "level", None)
+        if value and not was_finished and level is not None:
+            level.on_item_finished(self)
+
+    @property
+    def glow_surface(self):
+        return glow_surface(self.rect.size)
 
     def is_near(self, player_rect):
         dx = abs(self.rect.centerx - player_rect.centerx)
@@ -71,229 +122,261 @@ class Item:
     def set_message_callback(self, callback):
         self.show_message = callback
 
+    def is_glowing(self, player_rect):
+        return self.is_near(player_rect) and self.interactable and self.glow and self.reinteractable
+
+    def draw_state(self, player_rect):
+        """Everything that changes how the item looks, used to find items that need repainting"""
+        return (self.image, tuple(self.rect), self.is_active, self.is_active and self.is_glowing(player_rect))
+
     def draw(self, surface, player_rect, show_hitbox=False):
         if not self.is_active:
             return
         surface.blit(self.image, self.rect.topleft)
-        if self.is_near(player_rect) and self.interactable and self.glow and self.reinteractable:
+        if self.is_glowing(player_rect):
             surface.blit(self.glow_surface, self.rect.topleft)
         if show_hitbox:
-            pygame.draw.rect(surface, (0,255,0), self.rect, 2)
+            gfx.rect(surface, (0,255,0), self.rect, 2)
 
     def collides_with(self, other_rect):
         return self.is_active and self.rect.colliderect(other_rect)
 
+    def finished_look(self):
+        """Sprite changes that come with finishing the item"""
+        pass
+
+    def restore_finished(self):
+        """Puts the item in the state interacting with it left it in, without the messages and sounds"""
+        self.finished_look()
+        for name, value in self.finished_attrs.items():
+            setattr(self, name, value)
+        self.is_finished = True
+
 #Specialized item types
 # level 1
 class Carpet(Item):
+    __slots__ = ()
+    sounds = ("Assets/carpet.mp3",)
+    finished_attrs = {"interactable": False, "reinteractable": False}
     def interact(self):
-        global trapdoor_found
-        trapdoor_found = True
+        state.give(gamestate.TRAPDOOR)
         self.show_message("You folded the carpet and found a trapdoor!", 3)
+        self.finished_look()
+        audio.play("Assets/carpet.mp3", "sfx")
+        self.is_finished = True
+        self.interactable = False
+        self.reinteractable = False
+
+    def finished_look(self):
         new_x, new_y = (0, -300)
         pos_x = new_x + half_w
         pos_y = half_h - new_y
         self.rect.center = (pos_x, pos_y)
-        self.image = pygame.image.load("Assets/folded_carpet.png").convert_alpha()
+        self.image = assets.image("Assets/folded_carpet.png", convert="alpha")
         self.rect = self.image.get_rect(center=self.rect.center)
-        pygame.mixer.Sound("Assets/carpet.mp3").play()
-        self.is_finished = True
-        self.interactable = False
-        self.reinteractable = False
         
 
 class Statue_m(Item):
+    __slots__ = ()
+    sounds = ("Assets/drink.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        wine = globals().get('wine', False)
-        if wine == False:
+        if not state.has(gamestate.WINE):
             self.show_message(f"The statue seems to be missing something...", 3)
-        elif wine == True:
+        else:
             self.show_message(f"You gave the wine to the statue. It seems satisfied.", 3)
-            pygame.mixer.Sound("Assets/drink.mp3").play()
+            audio.play("Assets/drink.mp3", "sfx")
             self.level.puzzles_solved += 1
             self.is_finished = True
             self.reinteractable = False
 
 class Statue_f(Item):
+    __slots__ = ()
+    sounds = ("Assets/swoosh.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        feather = globals().get('feather', False)
-        if feather == False:
+        if not state.has(gamestate.FEATHER):
             self.show_message(f"The statue seems to be missing something...", 3)
-        elif feather == True:
+        else:
             self.show_message(f"You gave the feather to the statue. It seems satisfied.", 3)
-            pygame.mixer.Sound("Assets/swoosh.mp3").play()
+            audio.play("Assets/swoosh.mp3", "sfx")
             self.level.puzzles_solved += 1
             self.is_finished = True
             self.reinteractable = False
 
 class Picture(Item):
+    __slots__ = ()
+    sounds = ("Assets/creak.mp3",)
     def interact(self):
-        pygame.mixer.Sound("Assets/creak.mp3").play()
+        audio.play("Assets/creak.mp3", "sfx")
         self.level.puzzles_solved += 1
         self.show_message(f"The picture shows a man with wine and a women with a feather", 3, 30)
         self.is_finished = True
 
 class Knife(Item):
-    pass
+    __slots__ = ()
 
 class Shovel(Item):
+    __slots__ = ()
+    sounds = ("Assets/shovel.mp3",)
+    finished_attrs = {"reinteractable": False, "is_active": False}
     def interact(self):
         self.show_message(f"You grabed the shovel!", 3)
-        global has_shovel
-        has_shovel = True
-        pygame.mixer.Sound("Assets/shovel.mp3").play()
+        state.give(gamestate.SHOVEL)
+        audio.play("Assets/shovel.mp3", "sfx")
         self.is_finished = True
         self.reinteractable = False
         self.is_active = False
 
 class Trash(Item):
+    __slots__ = ()
+    sounds = ("Assets/trash.mp3",)
+    finished_attrs = {"reinteractable": False, "is_active": False}
     def interact(self):
-        pygame.mixer.stop()
-        has_shovel = globals().get('has_shovel', False)
-        if has_shovel == False:
+        audio.stop("sfx")
+        if not state.has(gamestate.SHOVEL):
             self.show_message(f"You need something to dig through the trash.", 3)
-        elif has_shovel == True:
+        else:
             self.show_message(f"You dug through the trash!", 3)
-            pygame.mixer.Sound("Assets/trash.mp3").play(maxtime=4000)
+            audio.play("Assets/trash.mp3", "sfx", maxtime=4000)
             self.is_finished = True
             self.reinteractable = False
             self.is_active = False
-            while pygame.mixer.get_busy():
-                pygame.time.delay(1)
 
 class Chest(Item):
+    __slots__ = ()
+    sounds = ("Assets/chest_opened.mp3",)
+    finished_attrs = {"interactable": False, "reinteractable": False}
     def interact(self):
-        global wine
-        wine = True
+        state.give(gamestate.WINE)
         self.show_message(f"You found wine inside the chest.", 3)
         self.is_finished = True
-        self.image = pygame.image.load("Assets/chest_opened.png").convert_alpha()
-        pygame.mixer.Sound("Assets/chest_opened.mp3").play()
+        self.finished_look()
+        audio.play("Assets/chest_opened.mp3", "sfx")
         self.interactable = False
         self.reinteractable = False
 
+    def finished_look(self):
+        self.image = assets.image("Assets/chest_opened.png", convert="alpha")
+
 class MusicBox(Item):
+    __slots__ = ()
+    sounds = ("Assets/abc's.mp3",)
     def interact(self):
-        self.music = pygame.mixer.Sound("Assets/abc's.mp3")
-        self.music.set_volume(0.3)
-        if not pygame.mixer.get_busy():
-            self.music.play(-1)    
+        if not audio.is_busy("sfx"):
+            audio.play("Assets/abc's.mp3", "sfx", loops=-1, volume=0.3)
         else:
-            pygame.mixer.stop()
+            audio.stop("sfx")
         self.is_finished = True
 
 class Bookshelf(Item):
+    __slots__ = ()
+    sounds = (
+        'Assets/agartha.mp3', 'Assets/blue_collar.mp3', 'Assets/domer.mp3', 'Assets/eye_of_rah.mp3',
+        'Assets/how_to_aura_farm.mp3', 'Assets/i_need_this.mp3', 'Assets/mi_bombo.mp3',
+        'Assets/thank_you.mp3', 'Assets/the_art_of_67.mp3'
+    )
+    finished_attrs = {"interactable": False, "reinteractable": False}
     def interact(self):
-        message_1 = "Organizing things is always easier with music"
-        message_2 = "Use 'A' and 'D' to move, 'E' to select a book, and 'Ecs' to exit"
-        global feather
-        puzzle_active = True
-        correct_order = [
-            'Assets/agartha.png', 'Assets/blue_collar.png', 'Assets/domer.png', 'Assets/eye_of_rah.png',
-            'Assets/how_to_aura_farm.png', 'Assets/i_need_this.png', 'Assets/mi_bombo.png',
-            'Assets/thank_you.png', 'Assets/the_art_of_67.png'
-        ]
-        sound = [
-            'Assets/agartha.mp3', 'Assets/blue_collar.mp3', 'Assets/domer.mp3', 'Assets/eye_of_rah.mp3',
-            'Assets/how_to_aura_farm.mp3', 'Assets/i_need_this.mp3', 'Assets/mi_bombo.mp3',
-            'Assets/thank_you.mp3', 'Assets/the_art_of_67.mp3'
-        ]
-        books = correct_order.copy()
-        random.shuffle(books)
-        book_width = 85
-        book_height = 130
-        spacing = 5
-        width, height = 1920, 1080
-        half_w, half_h = width // 2, height // 2
-        book_images = [pygame.transform.scale(pygame.image.load(b).convert_alpha(),(book_width, book_height))for b in books]
-        total_width = len(books) * book_width + (len(books) - 1) * spacing
+        scenes.push(BookshelfPuzzle(self))
+
+class BookshelfPuzzle(LevelScene):
+    profile_name = "bookshelf"
+    message_1 = "Organizing things is always easier with music"
+    message_2 = "Use 'A' and 'D' to move, 'E' to select a book, and 'Ecs' to exit"
+    correct_order = [
+        'Assets/agartha.png', 'Assets/blue_collar.png', 'Assets/domer.png', 'Assets/eye_of_rah.png',
+        'Assets/how_to_aura_farm.png', 'Assets/i_need_this.png', 'Assets/mi_bombo.png',
+        'Assets/thank_you.png', 'Assets/the_art_of_67.png'
+    ]
+    book_width = 85
+    book_height = 130
+    spacing = 5
+
+    def __init__(self, bookshelf):
+        super().__init__(bookshelf.level)
+        self.bookshelf = bookshelf
+        self.books = self.correct_order.copy()
+        random.shuffle(self.books)
+        self.book_images = [assets.image(b, (self.book_width, self.book_height), "alpha") for b in self.books]
+        total_width = len(self.books) * self.book_width + (len(self.books) - 1) * self.spacing
         start_x = half_w - total_width // 2
         y_top = half_h
-        book_positions = [(start_x + i * (book_width + spacing) + book_width // 2, y_top)for i in range(len(books))]
-        order = []          # selected order
-        used_books = set()  # prevents duplicates
-        cursor_index = 0
-        puzzle_img = pygame.image.load("Assets/bookshelf_puzzle.png").convert_alpha()
-        puzzle_img = pygame.transform.scale(puzzle_img, (half_w, half_h))
-        puzzle_rect = puzzle_img.get_rect(center=(half_w, half_h))
-        clock = pygame.time.Clock()
-
-        while puzzle_active:
-            dt = clock.tick(60)
-            screen = pygame.display.get_surface()
-            self.level.draw(screen, self.level.items[0].rect)
-            screen.blit(puzzle_img, puzzle_rect.topleft)
-            for i, img in enumerate(book_images):
-                x, y = book_positions[i]
-                rect = img.get_rect(center=(x, y))
-                screen.blit(img, rect)
-                if i == cursor_index:
-                    glow = pygame.Surface((book_width, book_height), pygame.SRCALPHA)
-                    glow.fill((255, 255, 255, 100))
-                    screen.blit(glow, rect.topleft)
-            box_rect = pygame.Rect(0, height - 120, width, 120)
-            pygame.draw.rect(screen, (255, 255, 255), box_rect)
-            pygame.draw.rect(screen, (0, 0, 0), box_rect, 4)
-            font = pygame.font.Font("Assets/PressStart2P-Regular.ttf", 25)
-            screen.blit(font.render(message_1, True, (0, 0, 0)),(40, height - 100))
-            screen.blit(font.render(message_2, True, (0, 0, 0)),(40, height - 45))
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                elif event.type == pygame.KEYDOWN:
-                    if audioplaying != True:
-                        if event.key == pygame.K_ESCAPE:
-                            puzzle_active = False
-                        elif event.key == pygame.K_a:
-                            cursor_index = max(0, cursor_index - 1)
-                        elif event.key == pygame.K_d:
-                            cursor_index = min(len(book_images) - 1, cursor_index + 1)
-                        elif event.key == pygame.K_e:
-                            selected_book = books[cursor_index]
-                            target_index = len(order)
-                            if selected_book not in used_books:
-                                pygame.mixer.Sound(sound[correct_order.index(selected_book)]).play()
-                                used_books.add(selected_book)
-                                order.append(selected_book)
-                                books.pop(cursor_index)
-                                img = book_images.pop(cursor_index)
-                                books.insert(target_index, selected_book)
-                                book_images.insert(target_index, img)
-                                if cursor_index < target_index:
-                                    cursor_index = cursor_index
-                                elif cursor_index > target_index:
-                                    cursor_index += 1
-                                cursor_index = max(0, min(cursor_index, len(books) - 1))
-            if order == correct_order:
-                self.show_message("While cleaning you found a feather within a book", 3)
-                feather = True
-                self.is_finished = True
-                self.interactable = False
-                self.reinteractable = False
-                puzzle_active = False
-                return
-            if len(order) == len(correct_order) and order != correct_order:
-                self.show_message("You're so messy, try again whenever you want.", 3)
-                return
-            pygame.display.flip()
-            if pygame.mixer.get_busy():
-                audioplaying = True
-            else:
-                audioplaying = False
+        self.book_positions = [(start_x + i * (self.book_width + self.spacing) + self.book_width // 2, y_top)for i in range(len(self.books))]
+        self.order = []          # selected order
+        self.used_books = set()  # prevents duplicates
+        self.cursor_index = 0
+        self.audioplaying = False
+        self.puzzle_img = assets.image("Assets/bookshelf_puzzle.png", (half_w, half_h), "alpha")
+        self.puzzle_rect = self.puzzle_img.get_rect(center=(half_w, half_h))
+        self.glow = pygame.Surface((self.book_width, self.book_height), pygame.SRCALPHA)
+        self.glow.fill((255, 255, 255, 100))
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN or self.audioplaying:
+            return
+        if event.key == pygame.K_ESCAPE:
+            self.finish()
+        elif event.key == pygame.K_a:
+            self.cursor_index = max(0, self.cursor_index - 1)
+        elif event.key == pygame.K_d:
+            self.cursor_index = min(len(self.book_images) - 1, self.cursor_index + 1)
+        elif event.key == pygame.K_e:
+            books = self.books
+            cursor_index = self.cursor_index
+            selected_book = books[cursor_index]
+            target_index = len(self.order)
+            if selected_book not in self.used_books:
+                audio.play(self.bookshelf.sounds[self.correct_order.index(selected_book)], "voice")
+                self.used_books.add(selected_book)
+                self.order.append(selected_book)
+                books.pop(cursor_index)
+                img = self.book_images.pop(cursor_index)
+                books.insert(target_index, selected_book)
+                self.book_images.insert(target_index, img)
+                if cursor_index > target_index:
+                    cursor_index += 1
+                self.cursor_index = max(0, min(cursor_index, len(books) - 1))
+
+    def update(self, dt):
+        if self.order == self.correct_order:
+            self.bookshelf.show_message("While cleaning you found a feather within a book", 3)
+            state.give(gamestate.FEATHER)
+            self.bookshelf.is_finished = True
+            self.bookshelf.interactable = False
+            self.bookshelf.reinteractable = False
+            self.finish()
+        elif len(self.order) == len(self.correct_order):
+            self.bookshelf.show_message("You're so messy, try again whenever you want.", 3)
+            self.finish()
+        self.audioplaying = audio.is_busy("voice")
+
+    def draw(self, screen):
+        super().draw(screen)
+        screen.blit(self.puzzle_img, self.puzzle_rect.topleft)
+        for i, img in enumerate(self.book_images):
+            x, y = self.book_positions[i]
+            rect = img.get_rect(center=(x, y))
+            screen.blit(img, rect)
+            if i == self.cursor_index:
+                screen.blit(self.glow, rect.topleft)
+        box_rect = pygame.Rect(0, height - 120, width, 120)
+        gfx.rect(screen, (255, 255, 255), box_rect)
+        gfx.rect(screen, (0, 0, 0), box_rect, 4)
+        screen.blit(glyphs.render(self.message_1, 25),(40, height - 100))
+        screen.blit(glyphs.render(self.message_2, 25),(40, height - 45))
 
 
- 
 # level 2
 class Color(Item):
+    __slots__ = ()
+    finished_attrs = {"interactable": False, "reinteractable": False, "is_active": False}
     def interact(self):
-        screen = pygame.display.get_surface()
-        game = ColorMemoryGame(screen)  # use your main screen
-        has_red_light = globals().get('has_red_light', False)
-        has_blue_light = globals().get('has_blue_light', False) 
-        has_green_light = globals().get('has_green_light', False)
-        has_gray_light = globals().get('has_gray_light', False)
-        if has_red_light and has_blue_light and has_green_light and has_gray_light:
+        if state.has(gamestate.ALL_LIGHTS):
+            screen = pygame.display.get_surface()
+            # Minigames are only imported once they're played, so they cost nothing at startup
+            from color_game import ColorMemoryGame
+            game = ColorMemoryGame(screen)  # use your main screen
             won = game.run()
         else:
             self.show_message("You need to collect all 4 colored lights to play this game.", 3)
@@ -309,122 +392,142 @@ class Color(Item):
 
         return
 class Ladder(Item):
+    __slots__ = ()
+    sounds = ("Assets/creak.mp3",)
+    finished_attrs = {"reinteractable": False, "is_active": False}
     def interact(self):
-        global has_ladder
-        pygame.mixer.Sound("Assets/creak.mp3").play()
+        audio.play("Assets/creak.mp3", "sfx")
         self.show_message("You grabbed a ladder", 3)
-        has_ladder = True
+        state.give(gamestate.LADDER)
         self.is_finished = True
         self.reinteractable = False
         self.is_active = False
 class SmokeDetector(Item):
+    __slots__ = ()
+    sounds = ("Assets/smoke_detector_beep.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        has_ladder = globals().get('has_ladder', False)
-        global has_red_light
-        if has_ladder == False:
+        if not state.has(gamestate.LADDER):
             self.show_message("It's too high up", 3)
-            pygame.mixer.Sound("Assets/smoke_detector_beep.mp3").play()
-        elif has_ladder == True:
+            audio.play("Assets/smoke_detector_beep.mp3", "sfx")
+        else:
             self.show_message("You took out the red blinking light", 3)
-            has_red_light = True
+            state.give(gamestate.RED_LIGHT)
             self.is_finished = True
             self.reinteractable = False
 class Microwave(Item):
+    __slots__ = ()
+    sounds = ("Assets/ding.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        pygame.mixer.Sound("Assets/ding.mp3").play()
-        global has_green_light
+        audio.play("Assets/ding.mp3", "sfx")
         self.show_message("You ripped out a green light from the microwave's screen", 2)
-        has_green_light = True
+        state.give(gamestate.GREEN_LIGHT)
         self.is_finished = True
         self.reinteractable = False
 class Dresser(Item):
+    __slots__ = ()
+    sounds = ("Assets/carpet.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        pygame.mixer.Sound("Assets/carpet.mp3").play()
-        global has_gray_light
+        audio.play("Assets/carpet.mp3", "sfx")
         self.show_message("You took the gray light from the lamp", 2)
-        has_gray_light = True
+        state.give(gamestate.GRAY_LIGHT)
         self.is_finished = True
         self.reinteractable = False
 class Nightlight(Item):
+    __slots__ = ()
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        global has_blue_light
         self.show_message("You took the blue light from the nightlight", 2)
-        has_blue_light = True
+        state.give(gamestate.BLUE_LIGHT)
         self.is_finished = True
         self.reinteractable = False
 
 # level 3
 class Hammer(Item):
+    __slots__ = ()
+    sounds = ("Assets/shovel.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        global has_hammer
         self.show_message("You grabbed a hammer!", 3)
-        has_hammer = True
-        self.image = pygame.image.load("Assets/chest_opened.png").convert_alpha()
-        pygame.mixer.Sound("Assets/shovel.mp3").play()
+        state.give(gamestate.HAMMER)
+        self.finished_look()
+        audio.play("Assets/shovel.mp3", "sfx")
 
         self.is_finished = True
         self.reinteractable = False
 
+    def finished_look(self):
+        self.image = assets.image("Assets/chest_opened.png", convert="alpha")
+
 
 class Hole(Item):
+    __slots__ = ()
+    sounds = ("Assets/hehe.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        hammer_status = globals().get('has_hammer', False)
-        global lvl3comp
-        needed_score = 15
-        if not hammer_status:
-            pygame.mixer.Sound("Assets/hehe.mp3").play()
+        if not state.has(gamestate.HAMMER):
+            audio.play("Assets/hehe.mp3", "voice")
             self.show_message("You might need a tool for getting rid of this", 3)
 
         else:
-            game = WhackAMole()
-            score = game.run()
+            from whackamole import WhackAMole
+            scenes.push(WhackAMole(on_done=self.whacked))
 
-            if score >= needed_score:
-                self.show_message("You cleared all the moles!", 3)
-                self.is_finished = True
-                self.reinteractable = False
-            else:
-                self.show_message(f"You were unable to clear all the moles ({score}/{needed_score}).", 3)
+    def whacked(self, score):
+        needed_score = 15
+        if score >= needed_score:
+            self.show_message("You cleared all the moles!", 3)
+            self.is_finished = True
+            self.reinteractable = False
+        else:
+            self.show_message(f"You were unable to clear all the moles ({score}/{needed_score}).", 3)
                 
 
 # level 4
 class Red_Mouse(Item):
+    __slots__ = ()
+    sounds = ("Assets/hehe.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        cheese_status = globals().get('has_cheese', False)
-
-        if not cheese_status:
+        if not state.has(gamestate.CHEESE):
             self.show_message("Can you find my toy cheese and enter the password into the code box for me buddy", 3)
         else:
             self.show_message("You gave the cheese to Bobby. He seems satisfied.", 3)
-            pygame.mixer.Sound("Assets/hehe.mp3").play()
+            audio.play("Assets/hehe.mp3", "voice")
             self.level.puzzles_solved += 1
             self.is_finished = True
             self.reinteractable = False
             
 class Grey_Mouse(Item):
+    __slots__ = ()
+    sounds = ("Assets/hehe.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        pygame.mixer.Sound("Assets/hehe.mp3").play()
+        audio.play("Assets/hehe.mp3", "voice")
         self.show_message("Go replace the power unc", 3)
         self.level.puzzles_solved += 1
         self.is_finished = True
         self.reinteractable = False
             
 class Cheese_man(Item):
+    __slots__ = ()
+    finished_attrs = {"reinteractable": False, "is_active": False}
     def interact(self):
-        global has_cheese
         self.show_message("You have the cheese touch!", 3)
-        has_cheese = True
+        state.give(gamestate.CHEESE)
 
         self.is_finished = True
         self.reinteractable = False
         self.is_active = False
 
 class Barrel_1(Item):
+    __slots__ = ()
+    finished_attrs = {"interactable": False, "reinteractable": False}
     def interact(self):
-        barrel = globals().get('barrel', 0)
-        if barrel == 1:
-            global battery
-            battery = True
+        if state.barrel == 1:
+            state.give(gamestate.BATTERY)
 
             self.show_message("You found a battery inside the barrel.", 3)
 
@@ -441,11 +544,11 @@ class Barrel_1(Item):
             self.reinteractable = False
 
 class Barrel_2(Item):
+    __slots__ = ()
+    finished_attrs = {"interactable": False, "reinteractable": False}
     def interact(self):
-        barrel = globals().get('barrel', 0)
-        if barrel == 2:
-            global battery
-            battery = True
+        if state.barrel == 2:
+            state.give(gamestate.BATTERY)
 
             self.show_message("You found a battery inside the barrel.", 3)
 
@@ -462,11 +565,11 @@ class Barrel_2(Item):
             self.reinteractable = False
 
 class Barrel_3(Item):
+    __slots__ = ()
+    finished_attrs = {"interactable": False, "reinteractable": False}
     def interact(self):
-        barrel = globals().get('barrel', 0)
-        if barrel == 3:
-            global battery
-            battery = True
+        if state.barrel == 3:
+            state.give(gamestate.BATTERY)
 
             self.show_message("You found a battery inside the barrel.", 3)
 
@@ -483,46 +586,51 @@ class Barrel_3(Item):
             self.reinteractable = False
 
 class Vent_6(Item):
+    __slots__ = ()
+    finished_attrs = {"interactable": False, "reinteractable": False}
     def interact(self):
-        global hint_found
-        hint_found = True
+        state.give(gamestate.HINT)
 
         self.show_message("You found a clue!", 3)
+        self.finished_look()
+
+        self.is_finished = True
+        self.interactable = False
+        self.reinteractable = False
 
+    def finished_look(self):
         # Change sprite
-        self.image = pygame.image.load("level_4/code_6.png").convert_alpha()
-        
         new_width = 90   
         new_height = 90
-        self.image = pygame.transform.scale(self.image, (new_width, new_height))
+        self.image = assets.image("level_4/code_6.png", (new_width, new_height), "alpha")
         
         self.rect = self.image.get_rect(center=self.rect.center)
-
-        self.is_finished = True
-        self.interactable = False
-        self.reinteractable = False
         
 class Vent_7(Item):
+    __slots__ = ()
+    finished_attrs = {"interactable": False, "reinteractable": False}
     def interact(self):
-        global hint_found
-        hint_found = True
+        state.give(gamestate.HINT)
 
         self.show_message("You found a clue!", 3)
+        self.finished_look()
 
+        self.is_finished = True
+        self.interactable = False
+        self.reinteractable = False
+
+    def finished_look(self):
         # Change sprite
-        self.image = pygame.image.load("level_4/code_7.png").convert_alpha()
-        
         new_width = 90   
         new_height = 90
-        self.image = pygame.transform.scale(self.image, (new_width, new_height))
+        self.image = assets.image("level_4/code_7.png", (new_width, new_height), "alpha")
         
         self.rect = self.image.get_rect(center=self.rect.center)
 
-        self.is_finished = True
-        self.interactable = False
-        self.reinteractable = False
-
 class Code_box(Item):
+    __slots__ = ("correct_code",)
+    sounds = ("Assets/the_art_of_67.mp3",)
+    finished_attrs = {"interactable": False, "reinteractable": False}
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.correct_code = ["6", "7", "6", "7"]   # required sequence
@@ -530,8 +638,20 @@ class Code_box(Item):
 
 
     def interact(self):
-        message_1 = "Do you hear the knocking in the vents"
-        message_2 = "Use 'A' and 'D' to move, 'E' to select a key, 'Ecs' to exit, and 'Enter' to submit"
+        scenes.push(CodeBoxPuzzle(self))
+
+class CodeBoxPuzzle(LevelScene):
+    profile_name = "code_box"
+    message_1 = "Do you hear the knocking in the vents"
+    message_2 = "Use 'A' and 'D' to move, 'E' to select a key, 'Ecs' to exit, and 'Enter' to submit"
+    key_size = (100, 100)
+    key_paths = [
+        f"level_4/{i}.png" for i in range(1, 10)
+    ]
+
+    def __init__(self, code_box):
+        super().__init__(code_box.level)
+        self.code_box = code_box
 
         # --- LOAD PUZZLE IMAGE ---
         """puzzle_img = pygame.image.load("level_4/key_pad.png").convert_alpha()
@@ -539,147 +659,125 @@ class Code_box(Item):
         puzzle_rect = puzzle_img.get_rect(center=(half_w, half_h))"""
 
         # --- LOAD KEYS (1-9 IMAGES) ---
-        key_size = (100, 100)
-        key_paths = [
-            f"level_4/{i}.png" for i in range(1, 10)
-        ]
-
-        key_images = [
-            pygame.transform.scale(
-                pygame.image.load(path).convert_alpha(),
-                key_size
-            ) for path in key_paths
+        self.key_images = [
+            assets.image(path, self.key_size, "alpha") for path in self.key_paths
         ]
 
         # --- PUZZLE VARIABLES ---
-        cursor_index = 0
-        code_entered = []
-        puzzle_active = True
-        audioplaying = False
-
-        clock = pygame.time.Clock()
-        screen = pygame.display.get_surface()
-
-        # -----------------------------------------
-        #                PUZZLE LOOP
-        # -----------------------------------------
-        while puzzle_active:
-            dt = clock.tick(60)
-
-            # draw background level
-            if hasattr(self, "level"):
-                self.level.draw(screen, self.level.items[0].rect)
-
-            # draw keypad backdrop
-
-            # draw keys row
-            key_y =  height // 2 + 200
-
-            for i, img in enumerate(key_images):
-                x = (width//2 - 490) + i * (10+key_size[0])
-
-                # draw highlight on selected key
-                if i == cursor_index:
-                    pygame.draw.rect(
-                        screen,
-                        (255, 255, 0),               # yellow border
-                        (x - 3, key_y - 3, key_size[0] + 6, key_size[1] + 6),
-                        3
-                    )
-
-                screen.blit(img, (x, key_y))
-            
-            box_rect = pygame.Rect(0, height - 120, width, 120)
-            pygame.draw.rect(screen, (255, 255, 255), box_rect)
-            pygame.draw.rect(screen, (0, 0, 0), box_rect, 4)
-            font = pygame.font.Font("Assets/PressStart2P-Regular.ttf", 20)
-            screen.blit(font.render(message_1, True, (0, 0, 0)),(40, height - 100))
-            screen.blit(font.render(message_2, True, (0, 0, 0)),(40, height - 45))
-
-            # show code so far
-            box_rect = pygame.Rect( half_w - (width // 4), half_h - 150, width // 2, 120)
-            pygame.draw.rect(screen, (255, 255, 255), box_rect)
-            pygame.draw.rect(screen, (0, 0, 0), box_rect, 4)
-            typed_text = "".join(code_entered)
-            font = pygame.font.Font("Assets/PressStart2P-Regular.ttf", 30)
-            txt_surf = font.render(typed_text, True, (0, 0, 0))
-            text_rect = txt_surf.get_rect(center=box_rect.center)
-            screen.blit(txt_surf, text_rect)
-
-
-            # EVENTS --------------------------
-            for event in pygame.event.get():
-
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-
-                if event.type == pygame.KEYDOWN and not audioplaying:
-
-                    # close puzzle
-                    if event.key == pygame.K_ESCAPE:
-                        puzzle_active = False
-
-                    # move left
-                    elif event.key == pygame.K_a:
-                        cursor_index = max(0, cursor_index - 1)
-
-                    # move right
-                    elif event.key == pygame.K_d:
-                        cursor_index = min(8, cursor_index + 1)
-
-                    # select number
-                    elif event.key == pygame.K_e and len(code_entered) < len(self.correct_code):
-                        number = str(cursor_index + 1)
-                        code_entered.append(number)
-
-                    elif event.key == pygame.K_RETURN:
-                        if code_entered == self.correct_code:
-                            self.show_message("The lock clicks open.", 3)
-                            self.is_finished = True
-                            self.interactable = False
-                            self.reinteractable = False
-                            pygame.mixer.Sound("Assets/the_art_of_67.mp3").play()
-                            return
-
-                        # wrong + full length → fail
-                        if len(code_entered) == len(self.correct_code) and code_entered != self.correct_code:
-                            self.show_message("Wrong code, try again.", 3)
-                            return
-
-            # update audio state
-            pygame.display.flip()
+        self.cursor_index = 0
+        self.code_entered = []
+        self.audioplaying = False
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN or self.audioplaying:
+            return
+        correct_code = self.code_box.correct_code
+
+        # close puzzle
+        if event.key == pygame.K_ESCAPE:
+            self.finish()
+
+        # move left
+        elif event.key == pygame.K_a:
+            self.cursor_index = max(0, self.cursor_index - 1)
+
+        # move right
+        elif event.key == pygame.K_d:
+            self.cursor_index = min(8, self.cursor_index + 1)
+
+        # select number
+        elif event.key == pygame.K_e and len(self.code_entered) < len(correct_code):
+            number = str(self.cursor_index + 1)
+            self.code_entered.append(number)
+
+        elif event.key == pygame.K_RETURN:
+            if self.code_entered == correct_code:
+                self.code_box.show_message("The lock clicks open.", 3)
+                self.code_box.is_finished = True
+                self.code_box.interactable = False
+                self.code_box.reinteractable = False
+                audio.play("Assets/the_art_of_67.mp3", "voice")
+                self.finish()
+
+            # wrong + full length → fail
+            elif len(self.code_entered) == len(correct_code):
+                self.code_box.show_message("Wrong code, try again.", 3)
+                self.finish()
+
+    def draw(self, screen):
+        # draw background level
+        super().draw(screen)
+
+        # draw keys row
+        key_size = self.key_size
+        key_y =  height // 2 + 200
+
+        for i, img in enumerate(self.key_images):
+            x = (width//2 - 490) + i * (10+key_size[0])
+
+            # draw highlight on selected key
+            if i == self.cursor_index:
+                gfx.rect(
+                    screen,
+                    (255, 255, 0),               # yellow border
+                    (x - 3, key_y - 3, key_size[0] + 6, key_size[1] + 6),
+                    3
+                )
+
+            screen.blit(img, (x, key_y))
+        
+        box_rect = pygame.Rect(0, height - 120, width, 120)
+        gfx.rect(screen, (255, 255, 255), box_rect)
+        gfx.rect(screen, (0, 0, 0), box_rect, 4)
+        screen.blit(glyphs.render(self.message_1, 20),(40, height - 100))
+        screen.blit(glyphs.render(self.message_2, 20),(40, height - 45))
+
+        # show code so far
+        box_rect = pygame.Rect( half_w - (width // 4), half_h - 150, width // 2, 120)
+        gfx.rect(screen, (255, 255, 255), box_rect)
+        gfx.rect(screen, (0, 0, 0), box_rect, 4)
+        typed_text = "".join(self.code_entered)
+        txt_surf = glyphs.render(typed_text, 30)
+        text_rect = txt_surf.get_rect(center=box_rect.center)
+        screen.blit(txt_surf, text_rect)
 
 class Power_Bank(Item):
+    __slots__ = ()
+    sounds = ("Assets/ding.mp3",)
+    finished_attrs = {"reinteractable": False}
     def interact(self):
-        battery_status = globals().get('battery', False)
-
-        if not battery_status:
+        if not state.has(gamestate.BATTERY):
             self.show_message("You need to find a battery to put in here", 3)
         else:
             self.show_message("You have restored power to 100%", 3)
-            pygame.mixer.Sound("Assets/ding.mp3").play()
+            audio.play("Assets/ding.mp3", "sfx")
             self.level.puzzles_solved += 1
             self.is_finished = True
             self.reinteractable = False
 
 class Barrier_1(Item):
-    pass
+    __slots__ = ()
 
 class Barrier_2(Item):
-    pass
+    __slots__ = ()
 
 class Barrier_3(Item):
-    pass
+    __slots__ = ()
 
 class Barrier_4(Item):
-    pass
+    __slots__ = ()
 
 class Barrier_5(Item):
-    pass
+    __slots__ = ()
 
 #same for each level
 class Door(Item):
+    __slots__ = ("can_open",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.can_open = False
+
     def interact(self):
         """
         Door only opens if all puzzles are solved.
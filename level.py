@@ -1,230 +1,246 @@
 import pygame
+import bootstrap
+import threading
+import math
+import zlib
+import assets
+import leveldata
+from gamestate import state
+import gfx
+from audio import audio
+from spatial import SpatialGrid
 from item import Item, Carpet, Statue_m, Statue_f, Picture, Door, Chest, Shovel, Knife, Trash, MusicBox, Bookshelf, Dresser, Microwave, Nightlight, Ladder, SmokeDetector, Color, Hammer, Hole, Red_Mouse, Grey_Mouse, Cheese_man, Barrel_1, Barrel_2, Barrel_3, Vent_6, Vent_7, Code_box, Power_Bank, Barrier_1, Barrier_2, Barrier_3, Barrier_4, Barrier_5
-import os
-import platform
-import ctypes
-
-if platform.system() == "Windows":
-    try:
-        ctypes.windll.user32.SetProcessDPIAware()
-    except Exception:
-        pass
-
-if platform.system() == "Darwin":
-    os.environ["SDL_HINT_VIDEO_HIGHDPI_DISABLED"] = "0"
-    os.environ["PYGAME_FORCE_HIGHDPI"] = "1"
-
-pygame.init()
-width, height = 1920, 1080
+width, height = bootstrap.CANVAS
 center_x, center_y = width // 2, height // 2
 
+# Item classes level files can name, by class name
+ITEM_CLASSES = {cls.__name__: cls for cls in (
+    Item, Carpet, Statue_m, Statue_f, Picture, Door, Chest, Shovel, Knife, Trash, MusicBox, Bookshelf,
+    Dresser, Microwave, Nightlight, Ladder, SmokeDetector, Color, Hammer, Hole,
+    Red_Mouse, Grey_Mouse, Cheese_man, Barrel_1, Barrel_2, Barrel_3, Vent_6, Vent_7, Code_box, Power_Bank,
+    Barrier_1, Barrier_2, Barrier_3, Barrier_4, Barrier_5,
+)}
+
+def definition(level_id):
+    """The compiled level file of a level (see leveldata), None past the last level"""
+    return leveldata.load(level_id, ITEM_CLASSES)
+
+layouts = {}
+
+def layout(level_id):
+    """
+    A number for the order of a level's items, it changes when one is added, removed or reordered in the level file
+    Checkpoints keep item state by index, so one taken with another layout can't be restored
+    """
+    if level_id not in layouts:
+        data = definition(level_id)
+        items = [] if data is None else [(name, args[0]) for name, args, image_size in data.items]
+        layouts[level_id] = zlib.crc32(repr(items).encode())
+    return layouts[level_id]
+
+def load_assets(level_id):
+    """
+    Decodes, scales and converts every image a level needs into the asset cache
+    Safe to run on a worker thread, it only touches the cache
+    """
+    data = definition(level_id)
+    if data is None:
+        return
+    if data.background is not None:
+        assets.image(*data.background)
+    open_sprite = data.door_open
+    if open_sprite is not None:
+        audio.preload(["Assets/trap_door_open.mp3"])
+    for name, args, image_size in data.items:
+        cls = ITEM_CLASSES[name]
+        audio.preload(cls.sounds)
+        path, size = args[1], args[3]
+        resize = (image_size[0]*size[0], image_size[1]*size[1])
+        assets.image(path, resize)
+        if cls is Door and open_sprite is not None:
+            assets.image(open_sprite, resize, "alpha")
+
+prefetch_threads = {}
+
+def prefetch(level_id):
+    """Starts load_assets for a level on a background thread"""
+    if level_id in prefetch_threads or not leveldata.exists(level_id):
+        return
+    thread = threading.Thread(target=load_assets, args=(level_id,), daemon=True)
+    prefetch_threads[level_id] = thread
+    thread.start()
+
+def wait_for_prefetch(level_id):
+    thread = prefetch_threads.pop(level_id, None)
+    if thread is not None:
+        thread.join()
+
 class Level:
     def __init__(self, level_id, show_message_callback):
         self.level_id = level_id
         self.show_message = show_message_callback
-        self.items = []
-        width, height = center_x, center_y
-        # Load items depending on the level
-        if level_id == 1:
-            self.items = [
-                Door("trapdoor", "Assets/trapdoor.png", (0, -100), (1.5,1.5), False, False),
-                Carpet("carpet", "Assets/carpet.png", (0, -100), (1,1), False),
-                Picture("picture", "Assets/picture.png", (0, height), (1,1), False, False),
-                Statue_m("statue", "Assets/statue_m.png", (-200, height), (1,1), False, False),
-                Statue_f("statue", "Assets/statue_f.png", (200, height), (1,1), False, False),
-                Knife("knife", "Assets/knife.png", (-width+140, height-110), (1,1), False, False, never_interactable=True),
-                Shovel("shovel", "Assets/shovel.png", (width-140, height-115), (1,1.5), False, False),
-                Trash("trash", "Assets/trash.png", (-width, -330), (1,1), True, False),
-                Chest("chest", "Assets/chest.png", (-width, -250)),
-                MusicBox("music box", "Assets/music_box.png", (-width//2 + 50, height-200), (1,1), False, False),
-                Bookshelf("bookshelf", "Assets/bookshelf.png", (width, -height+375), (1,1), True, False),
-            ]
-            Knife.is_finished = True
-            self.background = pygame.image.load("Assets/attic.png").convert()
-            self.show_message("Oh no, I've been kidnapped I must ESCAPE", size = 32, queue=True)
-            self.show_message("I can use 'W','A','S','D' to get around", size = 32, queue=True)
-            self.show_message("I can use 'E' to interact with items that glow", size = 32, queue=True)
-
-        elif level_id == 2:
-            self.items = [
-                Door("bedroom door", "Assets/bedroom_door.png", (0, 345), (1,1), False, False),
-                Dresser("dresser", "Assets/dresser.png", (-400, 300), (.66,.66), True, True),
-                Microwave("microwave", "Assets/microwave.png", (250, 270), (.66,.66), True, True),
-                Nightlight("nightlight", "Assets/nightlight.png", (-width+30, height-300), (1,1), False, True),
-                Ladder("ladder", "Assets/ladder.png", (-250, 300), (.66,1), True, True),
-                SmokeDetector("smoke detector", "Assets/smoke_detector.png", (400, 370), (1,1), False, True), 
-                Color("color code", "Assets/color.png", (30, 325), (1,1), False, True),
-            ]
-            self.background = pygame.image.load("Assets/bedroom.png").convert()
-            self.background = pygame.transform.scale(self.background, (width*2, height*2))
-            self.show_message("I made it downstairs, but the door is locked!", size = 32, queue=True)
-            self.show_message("It looks like I need a code for the door", size = 32, queue=True)
-
-        elif level_id == 3:
-            self.items = [ 
-                          Door("pit","Assets/exit.png",(-600,-360),(1,1),False,True),
-                          Hammer("chest","Assets/chest.png",(0,250), (1,1), True, True),
-                          Hole("hole","Assets/hole.png",(-width+150,height-300), (1,1), False, True),
-                         ]
-            self.background = pygame.image.load("Assets/basement.png").convert()
-            self.show_message("It looks like I am in a basement now", size=32, queue=True)
-            self.show_message("I wonder what the dark pit by the bottom leads to", size=32, queue=True)
-
-        elif level_id == 4:
-            self.items = [
-                Door("door", "Assets/exit_door.png", (-155 , height - 160),
-                size=(.25, .25), collision=False, interactable=True),
-                
-                Vent_6("vent", "level_4/vent.png", (85 , height - 450),
-                size=(1.04, .88), collision=False, interactable=True),
-                
-                Vent_7("vent", "level_4/vent.png", (-40 , - height),
-                size=(1.04, 0.88), collision=False, interactable=True),
-                
-                Vent_6("vent", "level_4/vent.png", (-780 , height - 310),
-                size=(1.04, 0.88), collision=False, interactable=True),
-                
-                Vent_7("vent", "level_4/vent.png", (580 , height - 570),
-                size=(1.04, 0.88), collision=False, interactable=True),
-                
-                Code_box("code_box", "level_4/Pipe_line.png", (-275 , height - 210),
-                size=(0.13, 0.11), collision=False, interactable=True),
-                
-                Power_Bank("power_bank", "level_4/power_bank.png", (660 , height - 195),
-                size=(0.12, 0.1), collision=False, interactable=True),
-                
-                Cheese_man("cheese_toy", "level_4/Mr_Cheese.png.gif", (70 , - height),
-                size=(0.13, 0.11), collision=False, interactable=True),
-                
-                Grey_Mouse("grey_mouse", "level_4/Grey_Mouse.png", (85, height - 220),
-                size=(0.169, 0.143), collision=False, interactable=True),
-                
-                Red_Mouse("red_mouse", "level_4/Red_Mouse.png", (455, height - 220),
-                size=(0.169, 0.143), collision=False, interactable=True),
-                
-                Barrel_2("barrel", "level_4/Barrel.png", (780 , height - 525),
-                size=(1.1, 1), collision=False, interactable=True),
-                
-                Barrel_1("barrel", "level_4/Barrel.png", (-width , height - 300),
-                size=(1.1, 1), collision=False, interactable=True),
-                
-                Barrel_3("barrel", "level_4/Barrel.png", (-170 , -height + 145),
-                size=(1.1, 1), collision=False, interactable=True),
-
-                Barrier_1("barrier", "Assets/exit.png", (-width , -height),
-                size=(2.8, 2.8), collision=True, interactable=False, never_interactable=True),
-
-                Barrier_2("barrier", "Assets/exit.png", (width , -height),
-                size=(4, 2.15), collision=True, interactable=False, never_interactable=True),
-
-                Barrier_3("barrier", "Assets/exit.png", (-width//2 - 50, height-165),
-                size=(1.2, 1.3), collision=True, interactable=False, never_interactable=True),
-
-                Barrier_4("barrier", "Assets/exit.png", (-45, 250),
-                size=(.25, 1), collision=True, interactable=False, never_interactable=True),
-
-                Barrier_5("barrier", "Assets/exit.png", (335 , height - 200),
-                size=(.25, 1), collision=True, interactable=False, never_interactable=True),
-                ]   
-            Barrier_1.is_finished = True
-            Barrier_2.is_finished = True
-            Barrier_3.is_finished = True
-            Barrier_4.is_finished = True
-            Barrier_5.is_finished = True
-            self.background = pygame.image.load("level_4/sewer.png").convert_alpha()
-            self.background = pygame.transform.scale(self.background, (width*2, height*2))
-            self.show_message("I've entered the sewers, I need to find a way out", size=32, queue=True)
-            self.show_message("The sewer smell is overwhelming", size=32, queue=True)
-            self.show_message("Luckily, I have these boots that let float above the filth", size=32, queue=True)
-
+        # Asset phase: whatever was prefetched is already in the cache
+        wait_for_prefetch(level_id)
+        # Build phase, items only get their surfaces when they are first drawn
+        data = definition(level_id) or leveldata.LevelData(None, None, (), (), ())
+        if data.background is not None:
+            self.background = assets.image(*data.background)
+        for text in data.messages:
+            self.show_message(text, size=32, queue=True)
 
+        self.puzzles_solved = 0
+        # Puzzle dependency graph: finishing an item of the key class unlocks the listed classes
+        self.unlocks = {ITEM_CLASSES[key]: tuple(ITEM_CLASSES[name] for name in unlocked) for key, unlocked in data.unlocks}
+        # Sprite the door swaps to once every puzzle in the level is solved
+        self.door_open = data.door_open
+        self.set_items([ITEM_CLASSES[name](*args, image_size=image_size) for name, args, image_size in data.items])
+
+    def set_items(self, items):
+        """Hooks the items up to this level and resets everything derived from them"""
+        self.items = items
+        self.grid = SpatialGrid()
+        for item in self.items:
+            self.grid.insert(item)
+        # List order breaks ties between equally close items, like the old linear scan did
+        self.item_order = {item: i for i, item in enumerate(self.items)}
+        # Furthest a player's center can be from an item's center while is_near is still true
+        self.reach = max((math.hypot(*item.interact_radius) for item in self.items if not item.never_interactable), default=0)
+        self.closest_item = None
+        audio.preload({path for item in self.items for path in item.sounds})
         for item in self.items:
             item.set_message_callback(self.show_message)
             item.level = self
 
-        self.puzzles_solved = 0
+        self.items_by_type = {}
+        for item in self.items:
+            self.items_by_type.setdefault(type(item), []).append(item)
+        self.remaining_puzzles = sum(1 for item in self.items if self.is_puzzle(item) and not item.is_finished)
+        self.finished = False
+        if self.remaining_puzzles == 0:
+            self.open_doors()
+
+        # Background plus every item that can't currently change, rebuilt by bake() when an item changes
+        self.static_layer = None
+        self.dynamic_items = []
+        self.static_dirty = True
+
+    def restore(self, finished, inactive):
+        """
+        Puts the items straight into a saved state instead of replaying the interactions
+        finished / inactive: bitmasks over the item indices, as GameState keeps them
+        """
+        for i, item in enumerate(self.items):
+            if finished >> i & 1:
+                item.restore_finished()
+            if inactive >> i & 1:
+                item.is_active = False
+
+    def prefetch_next(self):
+        """Starts loading the next level's assets while this one is played"""
+        prefetch(self.level_id + 1)
 
     def update_interactable(self, player):
         """Only the closest item within range becomes interactable"""
         closest_item = None
-        min_distance_sq = float('inf')
-        for item in self.items:
+        closest_key = None
+        px, py = player.rect.center
+        max_distance_sq = self.reach * self.reach
+        # Anything outside reach can't be near the player, so only the cells around them are checked
+        for item in self.grid.query_radius(px, py, self.reach):
             if item.is_active and getattr(item, "interactable", True):
-                dx = item.rect.centerx - player.rect.centerx
-                dy = item.rect.centery - player.rect.centery
+                dx = item.rect.centerx - px
+                dy = item.rect.centery - py
                 distance_sq = dx*dx + dy*dy
-                if distance_sq < min_distance_sq:
-                    min_distance_sq = distance_sq
+                if distance_sq > max_distance_sq:
+                    continue
+                key = (distance_sq, self.item_order[item])
+                if closest_key is None or key < closest_key:
+                    closest_key = key
                     closest_item = item
         # Set interactable only for the closest item
-        for item in self.items:
-            item.glow = (item == closest_item)
-            item.can_interact_now = (item == closest_item)
+        if closest_item is not self.closest_item:
+            if self.closest_item is not None:
+                self.closest_item.glow = False
+                self.closest_item.can_interact_now = False
+            if closest_item is not None:
+                closest_item.glow = True
+                closest_item.can_interact_now = True
+            self.closest_item = closest_item
+
+    def interact_candidates(self):
+        """The only item the player could interact with this frame"""
+        return [self.closest_item] if self.closest_item is not None else []
+
+    def item_moved(self, item):
+        """Called by an item whenever its rect is replaced"""
+        self.grid.move(item)
+
+    def is_puzzle(self, item):
+        return not isinstance(item, Door) and not item.never_interactable
+
+    def on_item_finished(self, item):
+        """Called by an item the moment it becomes finished"""
+        state.item_finished(self.level_id, self.item_order[item])
+        if isinstance(item, Door):
+            if item.can_open:
+                self.finished = True
+            return
+        if not self.is_puzzle(item):
+            return
+        for unlocked_type in self.unlocks.get(type(item), ()):
+            for i in self.items_by_type.get(unlocked_type, ()):
+                if i.reinteractable:
+                    i.interactable = True
+        self.remaining_puzzles -= 1
+        if self.remaining_puzzles == 0:
+            self.open_doors()
+
+    def on_item_active(self, item):
+        """Called by an item whenever is_active is set"""
+        state.item_active(self.level_id, self.item_order[item], item.is_active)
+
+    def open_doors(self):
+        """Unlocks the doors and swaps in their open sprite, only runs once per level"""
+        open_sprite = self.door_open
+        for item in self.items_by_type.get(Door, ()):
+            if open_sprite is not None:
+                item.image = assets.image(open_sprite, item.resize, "alpha")
+                audio.play("Assets/trap_door_open.mp3", "sfx", priority=1)
+            item.can_open = True
 
     def is_finished(self):
-        """Checks if all puzzles are finished and unlocks doors if necessary"""
-        self.remaining_puzzles = sum(
-            1 for item in self.items if not isinstance(item, Door) and not item.is_finished and not item.never_interactable
-        )
-
-        # Level 1 specific logic
-        if self.level_id == 1:
-            for item in self.items:
-                if isinstance(item, Carpet) and item.is_finished:
-                    for i in self.items:
-                        if isinstance(i, Door) and i.reinteractable:
-                            i.interactable = True
-                        if isinstance(i, Picture) and i.reinteractable:
-                            i.interactable = True
-                if isinstance(item, Picture) and item.is_finished:
-                    for i in self.items:
-                        if isinstance(i, Statue_m) and i.reinteractable:
-                            i.interactable = True
-                        if isinstance(i, Statue_f) and i.reinteractable:
-                            i.interactable = True
-                        if isinstance(i, Shovel):
-                            i.interactable = True
-                        if isinstance(i, Trash) and i.reinteractable:
-                            i.interactable = True
-                        if isinstance(i, Bookshelf) and i.reinteractable:
-                            i.interactable = True
-                        if isinstance(i, MusicBox) and i.reinteractable:
-                            i.interactable = True
-        if self.level_id == 2:
-            for item in self.items:
-                if isinstance(item, Color) and item.is_finished:
-                    for i in self.items:
-                        if isinstance(i, Door) and i.reinteractable:
-                            i.interactable = True
-        if self.remaining_puzzles != 0:
-            for item in self.items:
-                if isinstance(item, Door):
-                    item.can_open = False
-            return False
-
+        """True once the door has been opened after all puzzles were finished"""
+        return self.finished
+
+    def bake(self):
+        """Composites the background and all static items into one surface"""
+        if self.static_layer is None:
+            self.static_layer = pygame.Surface((width, height)).convert()
+        self.static_layer.blit(self.background, (0, 0))
+        self.dynamic_items = []
         for item in self.items:
-            if isinstance(item, Door):
-                if self.level_id == 1:
-                    item.image = pygame.image.load("Assets/trapdoor_open.png").convert_alpha()
-                    item.image = pygame.transform.scale(item.image, item.resize)
-                    if not item.can_open:
-                        pygame.mixer.Sound("Assets/trap_door_open.mp3").play()
-                elif self.level_id == 2:
-                    item.image = pygame.image.load("Assets/bedroom_door_open.png").convert_alpha()
-                    item.image = pygame.transform.scale(item.image, item.resize)
-                    if not item.can_open:
-                        pygame.mixer.Sound("Assets/trap_door_open.mp3").play()
-                item.can_open = True
-                return item.is_finished
-        return False
+            if not item.is_active:
+                continue
+            # Items that can glow are drawn live, and so is anything stacked on top of them
+            if item.can_glow() or any(d.rect.colliderect(item.rect) for d in self.dynamic_items):
+                self.dynamic_items.append(item)
+            else:
+                item.draw(self.static_layer, self.static_layer.get_rect(), show_hitbox=False)
+        self.static_dirty = False
+        gfx.changed(self.static_layer)
+
+    def get_static_layer(self):
+        if self.static_dirty:
+            self.bake()
+        return self.static_layer
 
     def draw(self, surface, player_rect):
-        surface.blit(self.background, (0, 0))
-        for item in self.items:
+        surface.blit(self.get_static_layer(), (0, 0))
+        for item in self.dynamic_items:
             item.draw(surface, player_rect, show_hitbox=False)
 
     def collide_player(self, old_pos, player_rect, dx, dy):
-        for item in self.items:
+        for item in self.grid.query(player_rect):
             if item.collision and item.collides_with(player_rect):
                 # Handle X movement separately
                 if dx != 0:
@@ -0,0 +1,218 @@
+import os
+import json
+import marshal
+import threading
+from collections import namedtuple
+import pygame
+
+LEVEL_DIR = "levels"
+# Compiled levels are cached here, a cache file is rebuilt whenever its level file or one of its images changes
+CACHE_DIR = os.path.join(LEVEL_DIR, "__cache__")
+# Bump when the compiled layout changes so old cache files are ignored
+FORMAT = 1
+
+# Item fields in Item.__init__ argument order, with their defaults
+ITEM_FIELDS = (
+    ("name", None), ("image", None), ("pos", None), ("size", (1, 1)),
+    ("collision", True), ("interactable", True), ("reinteractable", True), ("never_interactable", False),
+)
+ITEM_KEYS = frozenset(key for key, default in ITEM_FIELDS)
+LEVEL_FIELDS = ("background", "door_open", "messages", "unlocks", "items")
+CONVERT_MODES = (None, "convert", "alpha")
+
+# background: (path, scale, convert) like assets.image takes them
+# items: (class name, Item args, unscaled image size)
+LevelData = namedtuple("LevelData", ("background", "door_open", "messages", "unlocks", "items"))
+
+
+class LevelDataError(ValueError):
+    """A level file that doesn't describe a valid level"""
+
+
+def source_path(level_id):
+    return os.path.join(LEVEL_DIR, f"level_{level_id}.json")
+
+
+def cache_path(level_id):
+    return os.path.join(CACHE_DIR, f"level_{level_id}.bin")
+
+
+def exists(level_id):
+    return os.path.isfile(source_path(level_id))
+
+
+def stamp(path):
+    st = os.stat(path)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+# ---------------------------------------------------------
+# Checking and compiling
+# ---------------------------------------------------------
+
+def is_pair(value, positive=False):
+    return (isinstance(value, list) and len(value) == 2
+            and all(isinstance(v, (int, float)) and not isinstance(v, bool) and (v > 0 or not positive) for v in value))
+
+
+def check_image(path, where):
+    if not isinstance(path, str):
+        raise LevelDataError(f"{where}: image path must be a string")
+    if not os.path.isfile(path):
+        raise LevelDataError(f"{where}: {path} does not exist")
+
+
+def compile_level(path, classes):
+    """
+    Checks a level file and compiles it into plain tuples, raises LevelDataError on anything wrong
+    classes is the names of the Item classes a level may use
+    Returns (LevelData tuple, files it depends on)
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise LevelDataError(f"{path}: {e}")
+    if not isinstance(data, dict):
+        raise LevelDataError(f"{path}: must be a JSON object")
+    for key in data:
+        if key not in LEVEL_FIELDS:
+            raise LevelDataError(f"{path}: unknown field {key!r}")
+    images = []
+
+    background = data.get("background")
+    if background is not None:
+        if not isinstance(background, dict):
+            raise LevelDataError(f"{path}: background must be an object")
+        check_image(background.get("path"), f"{path}: background")
+        scale = background.get("scale")
+        if scale is not None and not is_pair(scale, positive=True):
+            raise LevelDataError(f"{path}: background scale must be null or [width, height]")
+        convert = background.get("convert")
+        if convert not in CONVERT_MODES:
+            raise LevelDataError(f"{path}: background convert must be one of {CONVERT_MODES}")
+        images.append(background["path"])
+        background = (background["path"], tuple(scale) if scale else None, convert)
+
+    door_open = data.get("door_open")
+    if door_open is not None:
+        check_image(door_open, f"{path}: door_open")
+        images.append(door_open)
+
+    messages = data.get("messages", [])
+    if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+        raise LevelDataError(f"{path}: messages must be a list of strings")
+
+    unlocks = data.get("unlocks", {})
+    if not isinstance(unlocks, dict):
+        raise LevelDataError(f"{path}: unlocks must be an object")
+    for key, unlocked in unlocks.items():
+        if not isinstance(unlocked, list):
+            raise LevelDataError(f"{path}: unlocks of {key} must be a list")
+        for name in [key] + unlocked:
+            if name not in classes:
+                raise LevelDataError(f"{path}: unlocks names unknown item class {name!r}")
+
+    items = []
+    sizes = {}
+    for n, item in enumerate(data.get("items", [])):
+        where = f"{path}: item {n}"
+        if not isinstance(item, dict):
+            raise LevelDataError(f"{where}: must be an object")
+        for key in item:
+            if key != "class" and key not in ITEM_KEYS:
+                raise LevelDataError(f"{where}: unknown field {key!r}")
+        cls = item.get("class")
+        if cls not in classes:
+            raise LevelDataError(f"{where}: unknown item class {cls!r}")
+        for key in ("name", "image", "pos"):
+            if key not in item:
+                raise LevelDataError(f"{where}: missing {key}")
+        if not isinstance(item["name"], str):
+            raise LevelDataError(f"{where}: name must be a string")
+        check_image(item["image"], where)
+        if not is_pair(item["pos"]):
+            raise LevelDataError(f"{where}: pos must be [x, y]")
+        if not is_pair(item.get("size", [1, 1]), positive=True):
+            raise LevelDataError(f"{where}: size must be [x scale, y scale]")
+        for key in ("collision", "interactable", "reinteractable", "never_interactable"):
+            if not isinstance(item.get(key, False), bool):
+                raise LevelDataError(f"{where}: {key} must be true or false")
+
+        image = item["image"]
+        if image not in sizes:
+            # Only the header matters here, the pixels are decoded again when the item is first drawn
+            try:
+                sizes[image] = pygame.image.load(image).get_size()
+            except pygame.error as e:
+                raise LevelDataError(f"{where}: can't read {image}: {e}")
+            images.append(image)
+        args = tuple(tuple(item[key]) if isinstance(item.get(key), list) else item.get(key, default)
+                     for key, default in ITEM_FIELDS)
+        items.append((cls, args, sizes[image]))
+
+    level = LevelData(
+        background, door_open, tuple(messages),
+        tuple((key, tuple(unlocked)) for key, unlocked in unlocks.items()),
+        tuple(items),
+    )
+    return level, [path] + images
+
+
+# ---------------------------------------------------------
+# Cache
+# ---------------------------------------------------------
+
+def read_cache(level_id):
+    """The cached compile of a level, or None if there isn't one or it is out of date"""
+    try:
+        with open(cache_path(level_id), "rb") as f:
+            version, stamps, level = marshal.load(f)
+        if version != FORMAT or any(stamp(s[0]) != s for s in stamps):
+            return None
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    return LevelData(*level)
+
+
+def write_cache(level_id, level, depends):
+    """Best effort, a read-only install just compiles every run"""
+    path = cache_path(level_id)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            marshal.dump((FORMAT, tuple(stamp(p) for p in depends), tuple(level)), f)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass
+
+
+compiled = {}
+lock = threading.Lock()
+
+def load(level_id, classes):
+    """
+    The compiled LevelData of a level, None if it has no level file
+    Compiled at most once per run, and only again on a later run if its files changed
+    """
+    with lock:
+        if level_id in compiled:
+            return compiled[level_id]
+        level = None
+        if exists(level_id):
+            level = read_cache(level_id)
+            if level is None:
+                level, depends = compile_level(source_path(level_id), classes)
+                write_cache(level_id, level, depends)
+        compiled[level_id] = level
+        return level
+
+
+if __name__ == "__main__":
+    # Checks and compiles every level file, so a broken level shows up before the game is started
+    import level
+    level_id = 1
+    while exists(level_id):
+        data = load(level_id, level.ITEM_CLASSES)
+        print(f"{source_path(level_id)}: {len(data.items)} items -> {cache_path(level_id)}")
+        level_id += 1
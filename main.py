@@ -1,220 +1,221 @@
+import bootstrap
+bootstrap.init()
+import argparse
 import pygame
-import pygame_menu
-import time
-from player import Player
-from level import Level
-import os
-import platform
-import ctypes
+with bootstrap.step("import menus"):
+    import menus
+with bootstrap.step("import game modules"):
+    import messages
+    from gamestate import state
+    from checkpoint import saver
+    import gfx
+    from audio import audio
+    from player import Player
+    from level import Level
+    from renderer import DirtyRectRenderer
+    from timestep import FixedTimestep
+    import scenes
+    import credits
+    import profiler as prof
+    from profiler import profiler
 
-if platform.system() == "Windows":
-    try:
-        ctypes.windll.user32.SetProcessDPIAware()
-    except Exception:
-        pass
-
-if platform.system() == "Darwin":
-    os.environ["SDL_HINT_VIDEO_HIGHDPI_DISABLED"] = "0"
-    os.environ["PYGAME_FORCE_HIGHDPI"] = "1"
-
-pygame.init()
-
-width, height = 1920, 1080
+width, height = bootstrap.CANVAS
 center_x, center_y = width//2, height//2
-win = pygame.display.set_mode((width, height), pygame.FULLSCREEN)
+# Created by start(), so importing main doesn't open a window
+win = None
 clock = pygame.time.Clock()
-player = Player(width//2, height//2)
-
-ui_font = pygame.font.Font("Assets/PressStart2P-Regular.ttf", 32)  # adjust size if needed
-current_message = ""
-message_timer = 0
-message_queue = []
-def show_message(text, duration=2, size=32, queue=False):
-    global current_message, message_timer, ui_font, message_queue
-    if queue and current_message:
-        message_queue.append((text, duration, size))
-        return
-    ui_font = pygame.font.Font("Assets/PressStart2P-Regular.ttf", size)
-    current_message = text
-    message_timer = time.time() + duration
+# Opt-in: only repaint what changed and push it with display.update(rects) instead of flip()
+DIRTY_RECTS = False
+# Opt-in: draw the level and scenes as textures through the window's renderer, software blits if there isn't one
+GPU = False
+# The level is simulated at a fixed SIM_RATE steps a second whatever the frame rate, lower it on slow machines
+SIM_RATE = 60
+# Frames are paced by the display's refresh, each one interpolates the player between the last two steps
+VSYNC = True
+# Frames drawn per second at most, for displays that can't vsync or ignore it, 0 is uncapped and keeps a core busy
+MAX_FPS = 144
+# Puzzles and minigames are drawn at their old rate
+SCENE_FPS = 60
+show_message = messages.show_message
 
 def start():
-    pygame.mixer.music.load("Assets/start_menu_music.mp3")
-    pygame.mixer.music.set_volume(0.5)
-    pygame.mixer.music.play(-1)
-    background_image = pygame_menu.baseimage.BaseImage("Assets/start_background.png")
-    my_theme = pygame_menu.Theme(
-        title=False,
-        background_color=background_image,
-        widget_font = pygame.font.Font("Assets/PressStart2P-Regular.ttf", 32),
-        widget_font_size = 40,
-        widget_font_color = (255, 255, 255),
-        widget_padding = 10,
-        selection_color = (255, 255, 0),
-        widget_alignment = pygame_menu.locals.ALIGN_CENTER
-    )
-    my_theme.widget_selection_effect = pygame_menu.widgets.HighlightSelection(
-        border_width=5,   # thicker border
-        margin_x=100,       # wider box
-        margin_y=70        # taller box
-    )
-    menu = pygame_menu.Menu("Welcome", width, height, theme=my_theme)
-    img = menu.add.image("Assets/start_select.png")
-    start = menu.add.button("         ", game)
-    quit  = menu.add.button("         ", pygame_menu.events.EXIT)
-    img.translate(0, 0)
-    start.translate(-9, -289.5)
-    quit.translate(-9, -215)
+    global win
+    win = bootstrap.display(bootstrap.CANVAS, pygame.FULLSCREEN | pygame.SCALED, VSYNC)
+    if GPU and gfx.gpu is None:
+        gfx.use_gpu()
+    menu = start_menu()
+    bootstrap.report("start menu")
     menu.mainloop(win)
 
+def start_menu():
+    """
+    The start menu with its music, also when a game returns to it
+    Games run inside its button callbacks and simply return when they're over, so there is only ever one menu loop running
+    """
+    menus.play_music(menus.START_MUSIC)
+    return menus.start_menu(new_game, resume, saver.load() is not None)
+
 
-def unpause():
-    global paused
-    paused = False
 def pause():
-    global paused 
-    paused = True
-    pygame.mixer.music.load("Assets/pause_menu_music.mp3")
-    pygame.mixer.music.set_volume(0.5)
-    pygame.mixer.music.play(-1)
-    screen_surface = win.copy()
-    my_theme = pygame_menu.Theme(
-        title=False,
-        background_color=(50, 50, 50, 200),   # transparentish
-        widget_alignment=pygame_menu.locals.ALIGN_CENTER,
-        widget_font=pygame.font.Font("Assets/PressStart2P-Regular.ttf", 32),
-        widget_font_size=40,
-        widget_font_color=(255, 255, 255),
-        selection_color=(255, 255, 0),
-    )
-    my_theme.widget_selection_effect = pygame_menu.widgets.HighlightSelection(
-        border_width=5,   # thicker border
-        margin_x=105,       # wider box
-        margin_y=75        # taller box
-    )
-    pause_menu = pygame_menu.Menu(title="Paused", width=width, height=height, theme=my_theme)
-    img = pause_menu.add.image("Assets/pause_select.png")
-    resume = pause_menu.add.button("         ", unpause)
-    quit  = pause_menu.add.button("         ", start)
-    img.translate(0, 0)
-    resume.translate(-9, -277.5)
-    quit.translate(-9, -190) 
-    while paused:
-        win.blit(screen_surface, (0, 0))
-        events = pygame.event.get()
-        pause_menu.update(events)
-        pause_menu.draw(win)
-        pygame.display.update()
-    pygame.mixer.music.stop()
+    """True if quit was picked"""
+    return menus.pause(win)
 def end():
-    frames = [
-        "Assets/end_1.png", "Assets/end_2.png", "Assets/end_3.png", "Assets/end_4.png", "Assets/end_5.png",
-        "Assets/end_6.png", "Assets/end_7.png", "Assets/end_8.png", "Assets/end_9.png", "Assets/end_10.png",
-        "Assets/end_11.png", "Assets/end_12.png", "Assets/end_13.png", "Assets/end_14.png", "Assets/end_15.png"
-    ]
-    for frame in frames:
-        img = pygame.image.load(frame).convert_alpha()
-        img = pygame.transform.scale(img,(1920, 1150))
-        win.blit(img, (0, 0))
-        pygame.display.flip()
-        if frame == frames[2]:
-            pygame.time.delay(800)
-        elif frame == frames[11] or frame == frames[12] or frame == frames[13] or frame == frames[14]:
-            time.sleep(.0001)
-        else:
-            pygame.time.delay(300)
-        if frame == frames[0]:
-            pygame.mixer.music.load("Assets/end_menu_music.mp3")
-            pygame.mixer.music.set_volume(0.5)
-            pygame.mixer.music.play(-1)
-        if frame == frames[10]:
-            pygame.time.delay(1000)   
-    pygame.time.delay(3000)
-    screen_surface = win.copy()
-    pygame.image.save(screen_surface, "Assets/temp_pause_bg.png")
-    background_image = pygame_menu.baseimage.BaseImage(image_path="Assets/temp_pause_bg.png")
-    my_theme = pygame_menu.Theme(
-        title=False,
-        background_color=background_image,
-        widget_alignment=pygame_menu.locals.ALIGN_CENTER,
-        widget_font=pygame.font.Font("Assets/PressStart2P-Regular.ttf", 32),
-        widget_font_size=40,
-        widget_font_color=(255, 255, 255),
-        selection_color=(255, 255, 0),
-    )
-    my_theme.widget_selection_effect = pygame_menu.widgets.HighlightSelection(
-        border_width=5,   # thicker border
-        margin_x=105,       # wider box
-        margin_y=75        # taller box
-    )
-    end_menu = pygame_menu.Menu("Thank you", width, height, theme=my_theme)
-    img = end_menu.add.image("Assets/end_select.png")
-    menu= end_menu.add.button("         ", start)
-    quit  = end_menu.add.button("         ", pygame_menu.events.EXIT)
-    img.translate(0, 0)
-    menu.translate(-9, -277.5)
-    quit.translate(-9, -190) 
-    end_menu.draw(win)
-    end_menu.mainloop(win)
+    backdrop = credits.play(win, lambda: menus.play_music(menus.END_MUSIC))
+    end_menu = menus.end_menu()
+    end_menu.mainloop(win, bgfun=lambda: win.blit(backdrop, (0, 0)))
 
 
-def game():
-    global current_message, message_timer, message_queue, ui_font
-    pygame.mixer.music.stop()
-    player = Player(center_x, center_y)
-    level = Level(1, show_message)
+def new_game():
+    game()
+    start_menu()
+
+def resume():
+    """Picks the game up at the last checkpoint"""
+    game(saver.load())
+    start_menu()
+
+def game(saved=None):
+    """saved: (level id, snapshot) from a checkpoint, or None for a new game"""
+    menus.stop_music()
+    if saved is None:
+        # Every new game from the start menu starts over, nothing carries over from the last one
+        state.reset()
+        level_id = 1
+    else:
+        level_id, snapshot = saved
+        state.restore(snapshot)
+    messages.bus.clear()
+    player = Player(center_x, center_y, rate=SIM_RATE)
+    timestep = FixedTimestep(SIM_RATE)
+    level = Level(level_id, show_message)
+    if saved is not None:
+        level.restore(state.finished.get(level_id, 0), state.inactive.get(level_id, 0))
+    level.prefetch_next()
+    if level.level_id == 4:
+        credits.prefetch()
+    saver.save(level.level_id)
+    # The menus always draw on win, the level and scenes on the GPU target when there is one
+    screen = gfx.gpu or win
+    renderer = DirtyRectRenderer(win) if DIRTY_RECTS and not gfx.gpu else None
+    box_rect = messages.bus.box_rect
+    box_drawn = False
     
     while True:
-        dt = clock.tick(60)
-        level.update_interactable(player)
+        dt = clock.tick(SCENE_FPS if scenes.stack.top() else MAX_FPS)
+        profiler.begin_frame(scenes.stack.profile_name())
+        audio.update()
+        # Puzzles and minigames run as scenes on top of the level, which is frozen meanwhile
+        if scenes.stack.top():
+            events = pygame.event.get()
+            for event in events:
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    exit()
+            scenes.stack.step(events, dt, screen)
+            if scenes.stack.top():
+                gfx.present(screen)
+                profiler.lap(prof.FLIP)
+                profiler.end_frame()
+                continue
+            # The scene closed without drawing, so the level is drawn and presented in this same frame.
+            # Presenting now would show the puzzle's last frame, or a GPU back buffer nothing was drawn to
+            # Back in the level, whatever the puzzle changed is checkpointed
+            saver.save(level.level_id)
+            # Whatever the scene drew is gone once it closes
+            if renderer:
+                renderer.invalidate()
+            # The scene already had this frame's time
+            dt = 0
         keys = pygame.key.get_pressed()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    pause()
+                    if gfx.gpu:
+                        # The pause menu draws over win, which GPU frames never touch
+                        level.draw(win, player.rect)
+                        win.blit(player.current_frame(), player.rect.topleft)
+                        messages.bus.draw(win)
+                    if pause():
+                        # Back to the start menu, whose loop is still running below this one
+                        profiler.end_frame()
+                        return
+                    profiler.skip()
+                    if renderer:
+                        renderer.invalidate()
+                elif event.key == pygame.K_F3:
+                    profiler.toggle()
+                    if renderer:
+                        renderer.invalidate()
+                elif event.key == pygame.K_F4:
+                    profiler.dump()
                 elif event.key == pygame.K_e:
-                   player.try_interact(level.items)
-        # Movement
-        if level.level_id == 1:
-            level_id = 1
-        elif level.level_id == 2:
-            level_id = 2
-        elif level.level_id == 3:
-            level_id = 3
-        elif level.level_id == 4:
-            level_id = 4
-        old, dx, dy = player.handle_input(keys, level_id = level_id)
-        level.collide_player(old, player.rect, dx, dy)
-        # Animation
-        frame = player.animate()
-        level.draw(win, player.rect)
-        win.blit(frame, (player.rect.x, player.rect.y))
+                   player.try_interact(level.interact_candidates())
+                   saver.save(level.level_id)
+        profiler.lap(prof.EVENTS)
+        # Only time spent in the level counts, scenes don't add to it
+        timestep.advance(dt, level, player, keys)
+        frame = player.current_frame()
+        player_rect = player.draw_rect(timestep.alpha())
+        message_visible = messages.bus.visible()
+        if renderer:
+            extra = [box_rect] if message_visible or box_drawn else []
+            overlay_rect = profiler.overlay_rect()
+            if overlay_rect:
+                extra.append(overlay_rect)
+            dirty = renderer.draw(level, player_rect, frame, extra)
+        else:
+            level.draw(screen, player_rect)
+            screen.blit(frame, player_rect.topleft)
+        profiler.lap(prof.DRAW)
         
         #next level check
         if level.is_finished():
             level = Level(level.level_id + 1, show_message)
+            level.prefetch_next()
+            if level.level_id == 4:
+                # Decode the end credits while the last level is played
+                credits.prefetch()
             #reposition player
             player.rect.center = (center_x, center_y)
+            player.snap()
+            if level.level_id <= 4:
+                saver.save(level.level_id)
+        profiler.lap(prof.IS_FINISHED)
         if level.level_id > 4:
+            profiler.end_frame()
+            saver.clear()
             end()
             break
 
         # Display message
-        if current_message and time.time() < message_timer:
-            box_rect = pygame.Rect(0, height - 120, width, 120)
-            pygame.draw.rect(win, (255, 255, 255), box_rect)
-            pygame.draw.rect(win, (0, 0, 0), box_rect, 4)
-            text_surface = ui_font.render(current_message, True, (0, 0, 0))
-            win.blit(text_surface, (40, height - 90))
-        if current_message and time.time() >= message_timer:
-            if message_queue:
-                text, duration, size = message_queue.pop(0)
-                ui_font = pygame.font.Font("Assets/PressStart2P-Regular.ttf", size)
-                current_message = text
-                message_timer = time.time() + duration
-            else:
-                current_message = ""
-        pygame.display.flip()
-start()
+        box_drawn = message_visible
+        if message_visible:
+            messages.bus.draw(screen)
+        profiler.lap(prof.MESSAGES)
+        profiler.draw(screen)
+        profiler.lap(prof.OVERLAY)
+        if renderer:
+            overlay_rect = profiler.overlay_rect()
+            pygame.display.update(dirty + [overlay_rect] if overlay_rect else dirty)
+        else:
+            gfx.present(screen)
+        profiler.lap(prof.FLIP)
+        profiler.end_frame()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escape room")
+    # Read by bootstrap while the imports above run, listed here so it shows up in --help
+    parser.add_argument("--startup-profile", action="store_true", help="print how long each import and init step took once the start menu is up")
+    parser.add_argument("--sim-rate", type=int, default=SIM_RATE, help="simulation steps per second, the game plays at the same speed at any rate")
+    parser.add_argument("--fps", type=int, default=MAX_FPS, help=f"most frames drawn per second, also when vsync is on, 0 for uncapped (default {MAX_FPS})")
+    parser.add_argument("--vsync", action=argparse.BooleanOptionalAction, default=VSYNC, help="wait for the display's refresh, --fps still caps displays that can't")
+    parser.add_argument("--gpu", action="store_true", help="draw with SDL textures instead of software blits, falls back if the window has no renderer")
+    args = parser.parse_args()
+    if args.sim_rate < 1:
+        parser.error("--sim-rate must be at least 1")
+    if args.fps < 0:
+        parser.error("--fps can't be negative")
+    SIM_RATE, MAX_FPS, VSYNC, GPU = args.sim_rate, args.fps, args.vsync, args.gpu
+    start()
@@ -0,0 +1,149 @@
+import pygame
+import bootstrap
+import pygame_menu
+import assets
+
+width, height = bootstrap.CANVAS
+FONT_PATH = "Assets/PressStart2P-Regular.ttf"
+START_MUSIC = "Assets/start_menu_music.mp3"
+PAUSE_MUSIC = "Assets/pause_menu_music.mp3"
+END_MUSIC = "Assets/end_menu_music.mp3"
+# The paused game sleeps until there is input, and never redraws more often than this
+PAUSE_FPS = 30
+
+# Each menu is built the first time it's shown and reused after that
+menus = {}
+
+music = None          # path loaded into pygame.mixer.music
+music_paused = False
+# Set by the pause menu's quit button, pause() hands it back to the game loop instead of opening the start menu from inside it
+quit_picked = False
+
+
+def play_music(path):
+    """Loops a menu's music, a track that was only paused picks up where it left off instead of being reloaded"""
+    global music, music_paused
+    if pygame.mixer.get_init() is None:
+        return
+    if path == music and music_paused:
+        pygame.mixer.music.unpause()
+    else:
+        if path != music:
+            pygame.mixer.music.load(path)
+            music = path
+        pygame.mixer.music.set_volume(0.5)
+        pygame.mixer.music.play(-1)
+    music_paused = False
+
+def pause_music():
+    global music_paused
+    if pygame.mixer.get_init() is None:
+        return
+    pygame.mixer.music.pause()
+    music_paused = True
+
+def stop_music():
+    global music_paused
+    if pygame.mixer.get_init() is None:
+        return
+    pygame.mixer.music.stop()
+    music_paused = False
+
+
+def theme(background, margin, **kwargs):
+    my_theme = pygame_menu.Theme(
+        title=False,
+        background_color=background,
+        widget_alignment=pygame_menu.locals.ALIGN_CENTER,
+        widget_font=assets.font(FONT_PATH, 32),
+        widget_font_size=40,
+        widget_font_color=(255, 255, 255),
+        selection_color=(255, 255, 0),
+        **kwargs
+    )
+    my_theme.widget_selection_effect = pygame_menu.widgets.HighlightSelection(
+        border_width=5,       # thicker border
+        margin_x=margin[0],   # wider box
+        margin_y=margin[1]    # taller box
+    )
+    return my_theme
+
+def start_menu(on_start, on_continue, can_continue=False):
+    """can_continue shows the continue button, for when there is a checkpoint to go back to"""
+    if "start" not in menus:
+        background_image = pygame_menu.baseimage.BaseImage("Assets/start_background.png")
+        menu = pygame_menu.Menu("Welcome", width, height, theme=theme(background_image, (100, 70), widget_padding=10))
+        img = menu.add.image("Assets/start_select.png")
+        start = menu.add.button("         ", on_start)
+        quit  = menu.add.button("         ", pygame_menu.events.EXIT)
+        resume = menu.add.button("Continue", on_continue, font_size=32)
+        img.translate(0, 0)
+        start.translate(-9, -289.5)
+        quit.translate(-9, -215)
+        resume.translate(-9, -140)
+        menus["start"] = menu
+        menus["continue"] = resume
+    if can_continue:
+        menus["continue"].show()
+    else:
+        menus["continue"].hide()
+    return menus["start"]
+
+def quit_to_start():
+    global quit_picked
+    quit_picked = True
+    menus["pause"].disable()
+
+def pause_menu():
+    if "pause" not in menus:
+        # transparentish, the frozen game shows through
+        menu = pygame_menu.Menu(title="Paused", width=width, height=height, theme=theme((50, 50, 50, 200), (105, 75)))
+        img = menu.add.image("Assets/pause_select.png")
+        # Disabling the menu is what ends pause()
+        resume = menu.add.button("         ", menu.disable)
+        quit  = menu.add.button("         ", quit_to_start)
+        img.translate(0, 0)
+        resume.translate(-9, -277.5)
+        quit.translate(-9, -190)
+        menus["pause"] = menu
+    return menus["pause"]
+
+def end_menu():
+    """Its mainloop returns when main menu is picked, the caller goes back to the start menu"""
+    if "end" not in menus:
+        # Transparent, the last credits frame is drawn under it by the mainloop background function
+        menu = pygame_menu.Menu("Thank you", width, height, theme=theme((0, 0, 0, 0), (105, 75)))
+        img = menu.add.image("Assets/end_select.png")
+        main_menu = menu.add.button("         ", menu.disable)
+        quit  = menu.add.button("         ", pygame_menu.events.EXIT)
+        img.translate(0, 0)
+        main_menu.translate(-9, -277.5)
+        quit.translate(-9, -190)
+        menus["end"] = menu
+    menus["end"].enable()
+    return menus["end"]
+
+
+def pause(surface):
+    """
+    Shows the pause menu over the current frame until resume or quit is picked, returns True for quit
+    Blocks on the event queue instead of spinning, and only redraws when the menu reacted to input
+    """
+    global quit_picked
+    quit_picked = False
+    menu = pause_menu()
+    menu.enable()
+    backdrop = surface.copy()
+    play_music(PAUSE_MUSIC)
+    clock = pygame.time.Clock()
+    redraw = True
+    while menu.is_enabled():
+        if redraw:
+            surface.blit(backdrop, (0, 0))
+            menu.draw(surface)
+            pygame.display.update()
+        clock.tick(PAUSE_FPS)
+        events = [pygame.event.wait()] + pygame.event.get()
+        redraw = menu.update(events) or any(event.type == pygame.WINDOWEXPOSED for event in events)
+    pause_music()
+    return quit_picked
@@ -0,0 +1,85 @@
+import pygame
+import bootstrap
+from collections import deque
+import glyphs
+import gfx
+
+width, height = bootstrap.CANVAS
+BOX_HEIGHT = 120
+TEXT_POS = (40, height - 90)
+
+# Queued messages with a higher priority are shown before lower ones, equal priorities keep their order
+LOW, NORMAL, HIGH = 0, 1, 2
+
+
+class Message:
+    """One message, its text is rendered once when it's shown or queued"""
+    def __init__(self, text, duration, size, priority):
+        self.text = text
+        self.duration = duration * 1000   # ms of game time
+        self.size = size
+        self.priority = priority
+        self.surface = glyphs.render(text, size)
+
+
+class MessageBus:
+    """
+    The message box at the bottom of the screen and the messages waiting for it
+    Timed in game time with update(dt), so time spent paused or in a puzzle doesn't use up the queue
+    """
+    def __init__(self):
+        self.queue = deque()
+        self.current = None
+        self.remaining = 0
+        self.box_rect = pygame.Rect(0, height - BOX_HEIGHT, width, BOX_HEIGHT)
+
+    def show(self, text, duration=2, size=32, queue=False, priority=NORMAL):
+        """
+        Shows text for duration seconds, replacing what's up
+        With queue it waits for the current message instead, behind anything queued with the same or a higher priority
+        """
+        message = Message(text, duration, size, priority)
+        if queue and self.current:
+            # Usually just an append, the queue is scanned from the back for the first message that goes before this one
+            i = len(self.queue)
+            while i and self.queue[i - 1].priority < priority:
+                i -= 1
+            self.queue.insert(i, message)
+            return
+        self.current = message
+        self.remaining = message.duration
+
+    def update(self, dt):
+        """Advances the current message by dt ms of game time, moving on to the next queued one when it runs out"""
+        if self.current is None:
+            return
+        self.remaining -= dt
+        if self.remaining <= 0:
+            if self.queue:
+                self.current = self.queue.popleft()
+                self.remaining = self.current.duration
+            else:
+                self.current = None
+
+    def visible(self):
+        return self.current is not None
+
+    def draw(self, surface):
+        if self.current is None:
+            return
+        gfx.rect(surface, (255, 255, 255), self.box_rect)
+        gfx.rect(surface, (0, 0, 0), self.box_rect, 4)
+        surface.blit(self.current.surface, TEXT_POS)
+
+    def clear(self):
+        self.queue.clear()
+        self.current = None
+        self.remaining = 0
+
+
+bus = MessageBus()
+
+
+def show_message(text, duration=2, size=32, queue=False, priority=NORMAL):
+    """The callback levels and items are given"""
+    bus.show(text, duration, size, queue, priority)
@@ -1,39 +1,37 @@
 import pygame
+import bootstrap
+import assets
+from audio import audio
 import time
-import os
-import platform
-import ctypes
-
-if platform.system() == "Windows":
-    try:
-        ctypes.windll.user32.SetProcessDPIAware()
-    except Exception:
-        pass
-
-if platform.system() == "Darwin":
-    os.environ["SDL_HINT_VIDEO_HIGHDPI_DISABLED"] = "0"
-    os.environ["PYGAME_FORCE_HIGHDPI"] = "1"
-
-pygame.init()
-width, height = 1920, 1080
+width, height = bootstrap.CANVAS
 center_x, center_y = width//2, height//2
+# idle, then the walk cycle
+FRAMES = ("Assets/idle.png", "Assets/walk_1.png", "Assets/walk_2.png")
+DEFAULT_SPRITE_SIZE = height//8.5
+# Simulation steps per second, movement and animation are per second so any rate plays the same
+DEFAULT_RATE = 60
+# Tuned at 60 steps a second as 10 pixels and 0.3 walk frames a step
+SPEED = height//108 * 60      # pixels per second
+ANIMATION_RATE = 18           # walk cycle frames per second
+
 class Player:
-    def __init__(self, x, y, sprite_size=height//8.5):
+    def __init__(self, x, y, sprite_size=DEFAULT_SPRITE_SIZE, rate=DEFAULT_RATE):
         self.sprite_size = sprite_size
         self.rect = pygame.Rect(0, 0, sprite_size, sprite_size)
         self.rect.center = (x, y)
-        self.speed = height//108
+        # Where the rect was before the last step, drawing interpolates between the two
+        self.previous = self.rect.topleft
+        # Pixels per step, can be fractional, what doesn't make a whole pixel carries over to the next step
+        self.speed = SPEED / rate
+        self.carry = 0.0
 
         # animation
-        self.frames = [
-            pygame.image.load("Assets/idle.png"),
-            pygame.image.load("Assets/walk_1.png"),
-            pygame.image.load("Assets/walk_2.png")
-        ]
-        self.frames = [pygame.transform.scale(f, (sprite_size, sprite_size)) for f in self.frames]
+        self.frames = [assets.image(path, (sprite_size, sprite_size)) for path in FRAMES]
+        # Flipped once here instead of every frame the player faces left
+        self.flipped_frames = [pygame.transform.flip(frame, True, False) for frame in self.frames]
 
         self.frame_index = 0
-        self.animation_speed = 3/self.speed
+        self.animation_speed = ANIMATION_RATE / rate
         self.moving = False
         self.facing_right = True
 
@@ -42,27 +40,33 @@ class Player:
         self.interact_cooldown = 0.5
 
         # sound
-        self.footstep = pygame.mixer.Sound("Assets/footstep.mp3")
+        self.footstep = assets.sound("Assets/footstep.mp3")
 
     def handle_input(self, keys, top_limit=150, level_id = 0):
+        """Moves the player by one simulation step"""
         old = self.rect.copy()
+        self.previous = old.topleft
         self.moving = False
 
         dx = 0
         dy = 0
 
+        self.carry += self.speed
+        step = int(self.carry)
+        self.carry -= step
+
         if keys[pygame.K_w]:
-            dy -= self.speed
+            dy -= step
             self.moving = True
         if keys[pygame.K_s]:
-            dy += self.speed
+            dy += step
             self.moving = True
         if keys[pygame.K_a]:
-            dx -= self.speed
+            dx -= step
             self.moving = True
             self.facing_right = False
         if keys[pygame.K_d]:
-            dx += self.speed
+            dx += step
             self.moving = True
             self.facing_right = True
 
@@ -86,23 +90,36 @@ class Player:
 
         return old, dx, dy  # return previous position AND movement deltas
 
-    def animate(self):
+    def snap(self):
+        """Drops the interpolation after the player was placed somewhere instead of walking there"""
+        self.previous = self.rect.topleft
+
+    def draw_rect(self, alpha):
+        """Where to draw the player, alpha of the way from the previous step to the current one"""
+        x0, y0 = self.previous
+        return self.rect.move(round((x0 - self.rect.x) * (1 - alpha)), round((y0 - self.rect.y) * (1 - alpha)))
+
+    def step_animation(self):
+        """Advances the walk cycle by one simulation step"""
         if self.moving:
             self.frame_index += self.animation_speed
-            if not pygame.mixer.get_busy():
-                self.footstep.play()
+            if not audio.is_busy("footsteps"):
+                audio.play(self.footstep, "footsteps")
         else:
             self.frame_index = 0
 
         if self.frame_index >= len(self.frames):
             self.frame_index = 0
 
-        frame = self.frames[int(self.frame_index)]
+    def animate(self):
+        """One step of animation and the frame to draw, for loops that draw once per step"""
+        self.step_animation()
+        return self.current_frame()
 
+    def current_frame(self):
         if not self.facing_right:
-            frame = pygame.transform.flip(frame, True, False)
-
-        return frame
+            return self.flipped_frames[int(self.frame_index)]
+        return self.frames[int(self.frame_index)]
 
     def try_interact(self, items):
         now = time.time()
@@ -112,7 +129,8 @@ class Player:
         for item in items:
             if item.is_active and item.is_near(self.rect) and item.interactable and item.reinteractable:
                 if getattr(item, "can_interact_now", False):
-                    pygame.mixer.stop()
+                    audio.stop("sfx")
+                    audio.stop("voice")
                     item.interact()
                     self.last_interact = now
                     break
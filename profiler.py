@@ -0,0 +1,160 @@
+import pygame
+import json
+import time
+from array import array
+import glyphs
+
+# Frame phases, each frame's row in the ring buffer has one slot per phase
+PHASES = (
+    "events", "handle_input", "update_interactable", "collide_player", "is_finished",
+    "draw", "puzzle", "messages", "overlay", "flip",
+)
+(EVENTS, HANDLE_INPUT, UPDATE_INTERACTABLE, COLLIDE_PLAYER, IS_FINISHED,
+ DRAW, PUZZLE, MESSAGES, OVERLAY, FLIP) = range(len(PHASES))
+
+# Which loop or scene a frame came from
+SCENES = ("game", "bookshelf", "code_box", "whackamole")
+
+# Overlay text is only re-rendered every this many frames
+OVERLAY_REFRESH = 15
+
+
+class FrameProfiler:
+    """
+    Rolling per-phase frame timings in a fixed-size ring buffer, nothing is allocated per frame
+    Usage: begin_frame(), then lap(phase) after each phase, then end_frame()
+    Frames don't nest, puzzles and minigames are scenes stepped inside the game loop's own frames
+    """
+    def __init__(self, capacity=600):
+        self.capacity = capacity
+        self.phase_count = len(PHASES)
+        self.times = array("d", [0.0]) * (capacity * self.phase_count)
+        self.scenes = array("B", [0]) * capacity
+        self.totals = array("d", [0.0]) * self.phase_count   # sum of each phase over the buffer
+        self.next_row = 0
+        self.count = 0
+        self.row = -1
+        self.mark = time.perf_counter()
+        self.visible = False
+        self.overlay = None
+        self.overlay_age = 0
+
+    def begin_frame(self, scene="game"):
+        row = self.next_row
+        self.next_row = (row + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        base = row * self.phase_count
+        for i in range(self.phase_count):
+            self.totals[i] -= self.times[base + i]
+            self.times[base + i] = 0.0
+        self.scenes[row] = SCENES.index(scene)
+        self.row = row
+        self.mark = time.perf_counter()
+
+    def lap(self, phase):
+        """Charges the time since the last lap to phase"""
+        now = time.perf_counter()
+        elapsed = now - self.mark
+        self.mark = now
+        if self.row < 0:
+            return
+        self.times[self.row * self.phase_count + phase] += elapsed
+        self.totals[phase] += elapsed
+
+    def skip(self):
+        """Drops the time since the last lap, used after waiting on something like the pause menu"""
+        self.mark = time.perf_counter()
+
+    def end_frame(self):
+        self.row = -1
+        self.mark = time.perf_counter()
+
+    def average(self, phase):
+        return self.totals[phase] / self.count if self.count else 0.0
+
+    def peak(self, phase):
+        return max(self.times[row * self.phase_count + phase] for row in range(self.count)) if self.count else 0.0
+
+    def rows(self):
+        """Recorded rows oldest first, as (scene, [ms per phase])"""
+        start = (self.next_row - self.count) % self.capacity
+        for n in range(self.count):
+            row = (start + n) % self.capacity
+            base = row * self.phase_count
+            yield SCENES[self.scenes[row]], [t * 1000 for t in self.times[base:base + self.phase_count]]
+
+    # ---------------------------------------------------------
+    # Overlay
+    # ---------------------------------------------------------
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.overlay = None
+
+    def overlay_rect(self):
+        if not self.visible or self.overlay is None:
+            return None
+        return self.overlay.get_rect(topleft=(10, 10))
+
+    def draw(self, surface):
+        if not self.visible:
+            return
+        self.overlay_age -= 1
+        if self.overlay is None or self.overlay_age <= 0:
+            self.overlay = self.render_overlay()
+            self.overlay_age = OVERLAY_REFRESH
+        surface.blit(self.overlay, (10, 10))
+
+    def render_overlay(self):
+        size = 12
+        lines = [f"{'phase':20} {'avg ms':>8} {'peak ms':>8}"]
+        frame_avg = 0.0
+        for phase, name in enumerate(PHASES):
+            avg = self.average(phase) * 1000
+            frame_avg += avg
+            lines.append(f"{name:20} {avg:8.3f} {self.peak(phase) * 1000:8.3f}")
+        lines.append(f"{'frame':20} {frame_avg:8.3f}")
+        lines.append("F3 hide  F4 dump")
+        line_height = size + 6
+        overlay = pygame.Surface((size * 40 + 20, line_height * len(lines) + 20), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        for i, line in enumerate(lines):
+            overlay.blit(glyphs.render(line, size, (255, 255, 255)), (10, 10 + i * line_height))
+        return overlay
+
+    # ---------------------------------------------------------
+    # Export
+    # ---------------------------------------------------------
+
+    def dump(self, path="profile"):
+        """Writes the buffer to path.csv and a per-phase summary plus the rows to path.json"""
+        rows = list(self.rows())
+        with open(path + ".csv", "w") as f:
+            f.write(",".join(("frame", "scene") + PHASES) + "\n")
+            for n, (scene, times) in enumerate(rows):
+                f.write(",".join([str(n), scene] + [f"{t:.4f}" for t in times]) + "\n")
+        summary = {}
+        for phase, name in enumerate(PHASES):
+            samples = sorted(times[phase] for scene, times in rows)
+            summary[name] = {
+                "mean": sum(samples) / len(samples) if samples else 0.0,
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "max": samples[-1] if samples else 0.0,
+            }
+        with open(path + ".json", "w") as f:
+            json.dump({"phases": PHASES, "summary": summary,
+                       "rows": [{"scene": scene, "ms": times} for scene, times in rows]}, f, indent=2)
+        return path + ".csv", path + ".json"
+
+
+def percentile(samples, pct):
+    """samples must already be sorted"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))]
+
+
+profiler = FrameProfiler()
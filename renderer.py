@@ -0,0 +1,80 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    Repaints only the parts of the screen that changed since the last frame
+    draw() returns the rects that need to be pushed with pygame.display.update
+    """
+    def __init__(self, surface):
+        self.surface = surface
+        self.level = None
+        self.item_states = {}
+        self.player_rect = None
+        self.full = True
+
+    def invalidate(self):
+        """Forces a full redraw, used after something else drew over the whole screen"""
+        self.full = True
+
+    def draw(self, level, player_rect, frame, extra=()):
+        """
+        level: the Level being played
+        player_rect / frame: where and what the player looks like this frame
+        extra: rects that get drawn over afterwards (message box) and must be repainted underneath
+        """
+        if level is not self.level:
+            self.level = level
+            self.item_states = {}
+            self.full = True
+
+        dirty = [pygame.Rect(r) for r in extra]
+        for item in level.items:
+            state = item.draw_state(player_rect)
+            old = self.item_states.get(item)
+            if state != old:
+                if old is not None:
+                    dirty.append(pygame.Rect(old[1]))
+                dirty.append(item.rect.copy())
+                self.item_states[item] = state
+
+        # The player frame changes almost every frame, so its old and new spot are always repainted
+        if self.player_rect is not None:
+            dirty.append(self.player_rect)
+        self.player_rect = player_rect.copy()
+        dirty.append(self.player_rect)
+
+        if self.full:
+            self.full = False
+            level.draw(self.surface, player_rect)
+            self.surface.blit(frame, player_rect.topleft)
+            return [self.surface.get_rect()]
+
+        rects = merge_rects(dirty)
+        static_layer = level.get_static_layer()
+        for rect in rects:
+            self.surface.set_clip(rect)
+            self.surface.blit(static_layer, rect.topleft, rect)
+            for item in level.dynamic_items:
+                if item.rect.colliderect(rect):
+                    item.draw(self.surface, player_rect)
+            if player_rect.colliderect(rect):
+                self.surface.blit(frame, player_rect.topleft)
+        self.surface.set_clip(None)
+        return rects
+
+
+def merge_rects(rects):
+    """Unions overlapping rects so no area is repainted twice"""
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        i = 0
+        while i < len(merged):
+            if merged[i].colliderect(rect):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
@@ -0,0 +1,105 @@
+import pygame
+import profiler as prof
+from profiler import profiler
+
+
+class Scene:
+    """
+    Something the main loop runs on top of the level: puzzles and minigames
+    Each frame the main loop hands it the events, then calls update() and draw()
+    A scene calls finish() when it's done, the stack pops it and on_done gets the result
+    """
+    # Which profiler.SCENES row the scene's frames are recorded under
+    profile_name = "game"
+
+    def __init__(self, on_done=None):
+        self.on_done = on_done
+        self.finished = False
+        self.result = None
+
+    def enter(self):
+        """Called once when the scene is pushed"""
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, dt):
+        pass
+
+    def draw(self, surface):
+        pass
+
+    def finish(self, result=None):
+        self.finished = True
+        self.result = result
+
+
+class LevelScene(Scene):
+    """Scene drawn over a frozen picture of the level, rendered once when the scene is pushed"""
+    def __init__(self, level, on_done=None):
+        super().__init__(on_done)
+        self.level = level
+        self.backdrop = None
+
+    def enter(self):
+        surface = pygame.display.get_surface()
+        self.backdrop = pygame.Surface(surface.get_size()).convert()
+        # Drawn as if the player stood on the first item, like the old puzzle loops did
+        self.level.draw(self.backdrop, self.level.items[0].rect)
+
+    def draw(self, surface):
+        surface.blit(self.backdrop, (0, 0))
+
+
+class SceneStack:
+    def __init__(self):
+        self.scenes = []
+
+    def push(self, scene):
+        self.scenes.append(scene)
+        scene.enter()
+
+    def pop(self):
+        scene = self.scenes.pop()
+        if scene.on_done is not None:
+            scene.on_done(scene.result)
+        return scene
+
+    def top(self):
+        return self.scenes[-1] if self.scenes else None
+
+    def clear(self):
+        self.scenes = []
+
+    def step(self, events, dt, surface):
+        """
+        Runs one frame of the top scene, the caller still flips the display
+        Returns False when there is no scene, so the caller runs the level instead
+        """
+        scene = self.top()
+        if scene is None:
+            return False
+        for event in events:
+            scene.handle_event(event)
+        profiler.lap(prof.EVENTS)
+        scene.update(dt)
+        profiler.lap(prof.PUZZLE)
+        if scene.finished:
+            self.pop()
+        else:
+            scene.draw(surface)
+        profiler.lap(prof.DRAW)
+        return True
+
+    def profile_name(self):
+        """profiler.SCENES name for the frame about to run"""
+        scene = self.top()
+        return scene.profile_name if scene else "game"
+
+
+stack = SceneStack()
+
+
+def push(scene):
+    stack.push(scene)
@@ -0,0 +1,54 @@
+import pygame
+
+
+class SpatialGrid:
+    """
+    Uniform grid of item rects, so collision and proximity checks only look at nearby cells
+    Items are bucketed into every cell their rect overlaps and must be moved when their rect changes
+    """
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.cells = {}        # (cx, cy) -> items overlapping that cell
+        self.item_cells = {}   # item -> cells it was inserted into
+
+    def cells_for(self, rect):
+        cs = self.cell_size
+        x0, y0 = rect.left // cs, rect.top // cs
+        x1 = max(rect.left, rect.right - 1) // cs
+        y1 = max(rect.top, rect.bottom - 1) // cs
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def insert(self, item):
+        cells = self.cells_for(item.rect)
+        self.item_cells[item] = cells
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(item)
+
+    def remove(self, item):
+        for cell in self.item_cells.pop(item, ()):
+            bucket = self.cells[cell]
+            bucket.remove(item)
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, item):
+        """Re-buckets an item after its rect changed"""
+        if self.item_cells.get(item) == self.cells_for(item.rect):
+            return
+        self.remove(item)
+        self.insert(item)
+
+    def query(self, rect):
+        """Items whose cells overlap rect, each returned once, callers still do the exact test"""
+        found = []
+        seen = set()
+        for cell in self.cells_for(rect):
+            for item in self.cells.get(cell, ()):
+                if item not in seen:
+                    seen.add(item)
+                    found.append(item)
+        return found
+
+    def query_radius(self, x, y, radius):
+        radius = int(radius) + 1
+        return self.query(pygame.Rect(x - radius, y - radius, radius * 2, radius * 2))
@@ -0,0 +1,44 @@
+import messages
+import profiler as prof
+from profiler import profiler as default_profiler
+
+# Longest a single frame can advance the game clock, so a blocking pause or minigame doesn't count as played time
+MAX_FRAME_MS = 100
+
+
+def step(level, player, keys, step_ms, profiler=default_profiler):
+    """One simulation step of the level, the same in main.game(), the headless Simulation and the benchmark"""
+    messages.bus.update(step_ms)
+    level.update_interactable(player)
+    profiler.lap(prof.UPDATE_INTERACTABLE)
+    # Movement
+    old, dx, dy = player.handle_input(keys, level_id=level.level_id)
+    profiler.lap(prof.HANDLE_INPUT)
+    level.collide_player(old, player.rect, dx, dy)
+    profiler.lap(prof.COLLIDE_PLAYER)
+    # Animation
+    player.step_animation()
+
+
+class FixedTimestep:
+    """
+    Runs the level at a fixed number of steps a second whatever the frame rate
+    Frame time builds up in the accumulator and is spent a whole step at a time, the rest is drawn as alpha
+    """
+    def __init__(self, rate):
+        self.step_ms = 1000 / rate
+        self.accumulator = 0.0
+
+    def advance(self, dt, level, player, keys, profiler=default_profiler):
+        """Runs the steps dt ms of frame time is worth, returns how many ran"""
+        self.accumulator += min(dt, max(MAX_FRAME_MS, self.step_ms))
+        steps = 0
+        while self.accumulator >= self.step_ms:
+            self.accumulator -= self.step_ms
+            step(level, player, keys, self.step_ms, profiler)
+            steps += 1
+        return steps
+
+    def alpha(self):
+        """How far the frame is between the last step and the next, for Player.draw_rect"""
+        return self.accumulator / self.step_ms
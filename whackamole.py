@@ -1,25 +1,21 @@
+import bootstrap
 import pygame
+import assets
+from audio import audio
+import glyphs
 import random
-import time
-import os
-import platform
-import ctypes
-
-if platform.system() == "Windows":
-    try:
-        ctypes.windll.user32.SetProcessDPIAware()
-    except Exception:
-        pass
-
-if platform.system() == "Darwin":
-    os.environ["SDL_HINT_VIDEO_HIGHDPI_DISABLED"] = "0"
-    os.environ["PYGAME_FORCE_HIGHDPI"] = "1"
-
-class WhackAMole:
-    def __init__(self):
-        pygame.init()
-        info = pygame.display.Info()
-        self.SCREEN_WIDTH, self.SCREEN_HEIGHT = info.current_w, info.current_h
+from scenes import Scene
+class WhackAMole(Scene):
+    """
+    Whack-a-mole minigame, a Scene so the main loop drives it
+    on_done gets the final score, run() plays it in its own loop instead
+    """
+    profile_name = "whackamole"
+
+    def __init__(self, on_done=None):
+        super().__init__(on_done)
+        bootstrap.init()
+        self.SCREEN_WIDTH, self.SCREEN_HEIGHT = bootstrap.CANVAS
 
         self.score = 0
         self.game_duration = 15   # seconds
@@ -29,9 +25,6 @@ class WhackAMole:
         self.BLACK = (0, 0, 0)
         self.WHITE = (255, 255, 255)
 
-        # Custom events
-        self.MOLE_POP_EVENT = pygame.USEREVENT + 1
-
         # Hole coordinates
         self.HOLE_POSITIONS = [
             (750, 700), (950, 700), (1150, 700),
@@ -41,18 +34,17 @@ class WhackAMole:
         self.MOLE_RADIUS = 30
 
         # Load assets once
-        self.hole_img = pygame.image.load("Assets/hole.png").convert_alpha()
-        self.mole_img = pygame.image.load("Assets/mole.png").convert_alpha()
-        self.bg_img = pygame.image.load("Assets/basement.png").convert_alpha()
-        self.bg_img = pygame.transform.scale(self.bg_img, (self.SCREEN_WIDTH*1.5, self.SCREEN_HEIGHT*1.5))
+        self.hole_img = assets.image("Assets/hole.png", convert="alpha")
+        self.mole_img = assets.image("Assets/mole.png", convert="alpha")
+        self.bg_img = assets.image("Assets/basement.png", (self.SCREEN_WIDTH*1.5, self.SCREEN_HEIGHT*1.5), "alpha")
 
-        self.whack_sound = pygame.mixer.Sound("Assets/whack.mp3")
-        self.whack_sound.set_volume(0.25)
+        self.whack_sound = assets.sound("Assets/whack.mp3")
+        self.taunt_sound = assets.sound("Assets/hehe.mp3")
 
-        self.taunt_sound = pygame.mixer.Sound("Assets/hehe.mp3")
-        self.taunt_sound.set_volume(0.25)
+        self.font_size = 32
 
-        self.font = pygame.font.Font("Assets/PressStart2P-Regular.ttf", 32)
+        # How long the last frame stays up once time runs out (ms)
+        self.end_hold = 1500
 
     # ---------------------------------------------------------
     # Mole Sprite Class
@@ -68,27 +60,25 @@ class WhackAMole:
             self.is_up = False
             self.hide()
 
-        def show(self, duration_ms):
+        def show(self, hide_at):
+            """hide_at: game time in ms when the mole goes back down"""
             self.is_up = True
-            self.whack_time = pygame.time.get_ticks() + duration_ms
+            self.hide_at = hide_at
             self.rect.center = self.original_pos
 
         def hide(self):
             self.is_up = False
             self.rect.center = (-200, -200)
 
-        def update(self):
-            if self.is_up and pygame.time.get_ticks() > self.whack_time:
+        def update(self, now):
+            if self.is_up and now > self.hide_at:
                 self.hide()
 
     # ---------------------------------------------------------
-    # MAIN GAME FUNCTION
+    # SCENE
     # ---------------------------------------------------------
 
-    def run(self):
-        screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.FULLSCREEN)
-        clock = pygame.time.Clock()
-
+    def enter(self):
         # Setup mole objects
         self.moles = pygame.sprite.Group()
         self.mole_list = []
@@ -98,75 +88,95 @@ class WhackAMole:
             self.moles.add(mole)
             self.mole_list.append(mole)
 
-        # Begin mole popping timer
-        pygame.time.set_timer(self.MOLE_POP_EVENT, random.randint(800, 1500))
+        # Game time in ms, counted from the frame dt so time spent paused doesn't count
+        # Moles pop and hide on it too, so a run with a fixed dt plays out the same every time
+        self.elapsed = 0
+        # Game time of the next mole pop
+        self.next_pop = random.randint(800, 1500)
+        self.game_over = False
+        self.hold_left = self.end_hold
+
+    def handle_event(self, event):
+        if self.game_over:
+            return
+
+        # Handle Whack
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            pos = event.pos
+            for mole in self.mole_list:
+                if mole.is_up and mole.rect.collidepoint(pos):
+                    self.score += 1
+                    audio.play(self.whack_sound, "sfx", volume=0.25)
+                    mole.hide()
+                    # The next mole pops on the next update
+                    self.next_pop = self.elapsed
+                    break
+
+    def pop_mole(self):
+        hidden = [m for m in self.mole_list if not m.is_up]
+        if hidden:
+            mole = random.choice(hidden)
+            audio.play(self.taunt_sound, "voice", volume=0.25)
+            mole.show(self.elapsed + random.randint(500, 1200))
+        self.next_pop = self.elapsed + random.randint(800, 1500)
+
+    def time_left(self):
+        return max(0, self.game_duration - self.elapsed / 1000)
+
+    def update(self, dt):
+        # AUTO-END GAME WHEN TIME RUNS OUT, the last frame stays up for end_hold before the scene closes
+        if self.game_over:
+            self.hold_left -= dt
+            if self.hold_left <= 0:
+                self.finish(self.score)
+            return
+
+        self.elapsed += dt
+        if self.time_left() <= 0:
+            self.game_over = True
+            return
+
+        if self.elapsed >= self.next_pop:
+            self.pop_mole()
+        self.moles.update(self.elapsed)
+
+    def draw(self, screen):
+        screen.blit(self.bg_img, (0, 0))
 
-        start_time = time.time()
-        game_over = False
+        for x, y in self.HOLE_POSITIONS:
+            rect = self.hole_img.get_rect(center=(x, y + 20))
+            screen.blit(self.hole_img, (rect))
 
-        running = True
-        while running:
-            elapsed = time.time() - start_time
-            time_left = max(0, self.game_duration - elapsed)
+        # One blit per mole instead of Group.draw, so the GPU target can draw them too
+        for mole in self.mole_list:
+            if mole.is_up:
+                screen.blit(mole.image, mole.rect)
 
-            # AUTO-END GAME WHEN TIME RUNS OUT
-            if time_left <= 0 and not game_over:
-                game_over = True
-                pygame.time.set_timer(self.MOLE_POP_EVENT, 0)
+        score_text = glyphs.render(f"Score: {self.score}", self.font_size, self.WHITE)
+        time_text = glyphs.render(f"Time: {int(self.time_left())}s", self.font_size, self.WHITE)
 
-                pygame.display.flip()
-                pygame.time.delay(1500)
+        screen.blit(score_text, (50, 20))
+        screen.blit(time_text, (self.SCREEN_WIDTH - time_text.get_width() - 50, 20))
 
-                running = False
-                continue
+    # ---------------------------------------------------------
+    # STANDALONE LOOP
+    # ---------------------------------------------------------
 
+    def run(self):
+        """Plays the minigame in its own loop and returns the score"""
+        # Reuse the game's display, only open one when the minigame is run on its own
+        screen = pygame.display.get_surface() or bootstrap.display(bootstrap.CANVAS, pygame.FULLSCREEN | pygame.SCALED)
+        clock = pygame.time.Clock()
+
+        self.enter()
+        while not self.finished:
+            dt = clock.tick(self.FPS)
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    running = False
                     return self.score
-
-                if not game_over:
-
-                    # Handle Whack
-                    if event.type == pygame.MOUSEBUTTONDOWN:
-                        pos = event.pos
-                        for mole in self.mole_list:
-                            if mole.is_up and mole.rect.collidepoint(pos):
-                                self.score += 1
-                                self.whack_sound.play()
-                                mole.hide()
-                                pygame.event.post(pygame.event.Event(self.MOLE_POP_EVENT))
-                                break
-
-                    # Handle Mole Spawning
-                    if event.type == self.MOLE_POP_EVENT:
-                        hidden = [m for m in self.mole_list if not m.is_up]
-                        if hidden:
-                            mole = random.choice(hidden)
-                            self.taunt_sound.play()
-                            mole.show(random.randint(500, 1200))
-                        pygame.time.set_timer(self.MOLE_POP_EVENT, random.randint(800, 1500))
-
-            if not game_over:
-                self.moles.update()
-
-            # DRAWING
-            screen.blit(self.bg_img, (0, 0))
-
-            for x, y in self.HOLE_POSITIONS:
-                rect = self.hole_img.get_rect(center=(x, y + 20))
-                screen.blit(self.hole_img, (rect))
-
-            self.moles.draw(screen)
-
-            score_text = self.font.render(f"Score: {self.score}", True, self.WHITE)
-            time_text = self.font.render(f"Time: {int(time_left)}s", True, self.WHITE)
-
-            screen.blit(score_text, (50, 20))
-            screen.blit(time_text, (self.SCREEN_WIDTH - time_text.get_width() - 50, 20))
-
+                self.handle_event(event)
+            self.update(dt)
+            self.draw(screen)
             pygame.display.flip()
-            clock.tick(self.FPS)
-
 
         return self.score